@@ -9,30 +9,154 @@
 # Copyright:   (c) phenomroman 2023
 # Licence:     BSD
 #-------------------------------------------------------------------------------
-from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import freeze_support
 from datetime import datetime, timedelta
-from threading import Thread, Event, Lock
+from functools import cache
+from threading import Thread, Event
 from time import sleep
-from feats import loading, user_input, auto_column_width, html_to_xl, modify_raw
-import pandas as pd
+from feats import (loading, user_input, read_balance_sheet, read_bo, read_bo_chunks, modify_raw, modify_raw_chunks,
+                   evict_cache, keep_hot, branch_pivot, to_paisa, paisa_dtype, taka_frame, sum_chunks, OutputFile, output_formats,
+                   write_table, TaskGraph, ResultStore, Profiler, Progress, stage, staged, lazy_import, work)
+import argparse
+import sys
 import os
 
-# get last month as report period name and define reports
-report_period = datetime.strftime(datetime.today().replace(day=1) - timedelta(days=1), '%B%Y')
+# pandas is loaded when a report runs, so command line help and questions are shown at once
+pd = lazy_import('pandas')
+
+# define reports
 report_options = {1: 'ISS Import Loans', 2: 'ISS Import Bills Acceptance', 3: 'ISS Export Local Bills'}
+# branches of the bank, reports are generated for all of them unless given
+bank_br_codes = ['001', '091', '101', '102', '103', '104', '105', '106', '110', '116', '195', '200', '301', '331', '999']
+# directory to keep parsed balance sheets for reuse between reports and reruns
+cache_dir = '.iss_cache'
+# directory to keep results of report tasks with their input files, so reruns only recompute changed branches & reports
+store_dir = os.path.join(cache_dir, 'results')
+
+# class to keep name, dates and directories of a report period, so past months are generated from their own inputs
+class Period:
+    def __init__(self, balance_date, indir='.', outdir=None, key=''):
+        self.name = balance_date.strftime('%B%Y')
+        self.balance_date = balance_date.strftime('%Y-%m-%d')
+        self.first_date = balance_date.replace(month=1, day=1).strftime('%Y-%m-%d')
+        self.indir = indir
+        self.outdir = outdir or indir
+        # prefix of task names, so tasks of many periods can be in one task graph
+        self.key = key
+
+    # period of last month with inputs & reports in working directory unless given
+    @classmethod
+    def last_month(cls, indir='.', outdir=None):
+        return cls(datetime.today().replace(day=1) - timedelta(days=1), indir, outdir)
+
+    # period of a month given as YYYY-MM, with inputs in the directory of the month under given root
+    @classmethod
+    def month(cls, month, root='.', outroot=None):
+        balance_date = (datetime.strptime(month, '%Y-%m') + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        return cls(balance_date, os.path.join(root, month), os.path.join(outroot, month) if outroot else None, key=f'{month}:')
+
+    def input(self, *path):
+        return os.path.normpath(os.path.join(self.indir, *path))
+
+    def output(self, *path):
+        return os.path.normpath(os.path.join(self.outdir, *path))
+
+    def task(self, name):
+        return f'{self.key}{name}'
+
+# class to keep options of report runs, passed to report functions & tasks as one argument
+class Options:
+    def __init__(self, workers=1, work_files=True, chunk_size=0, report_format='xlsx', work_format='xlsx', exact=False,
+                 job_dir=None):
+        self.workers = workers
+        # work files are skipped with format none
+        self.work_files = work_files and work_format != 'none'
+        self.chunk_size = chunk_size
+        self.report_format = report_format
+        self.work_format = work_format
+        self.exact = exact
+        # directory of job files if report tasks are run by workers of other apps
+        self.job_dir = job_dir
+
+# function to get periods of months given as YYYY-MM or ranges as YYYY-MM:YYYY-MM, each month once if ranges overlap
+def backfill_periods(months, root='.', outroot=None):
+    periods = {}
+    for month in months:
+        start, _, end = month.partition(':')
+        for date in pd.period_range(start, end or start, freq='M'):
+            month = date.strftime('%Y-%m')
+            periods.setdefault(month, Period.month(month, root, outroot))
+    return list(periods.values())
+
+# GL headers of export bill report
+ldbp_gl = [150120019, 150120020, 150120028, 150420019, 150420020, 150420028, 150820027, 150120031, 150420031]
+local_bills_gl = [501240000, 501250000]
+# acceptance bill GLs of consolidated balance sheet
+bill_gl = [501040000, 501130000, 501140000, 501180000, 501280000, 501290000]
 
 # function to calculate loan related ISS report
-def iss_import_loan(br_codes, exclude_br=[]):
+def iss_import_loan(br_codes, exclude_br=[], period=None, options=None):
+    run_report(import_loan_tasks, br_codes, exclude_br, period, options)
+
+# function to add tasks of loan related ISS report to a task graph, returns task of the final report
+def import_loan_tasks(graph, br_codes, exclude_br=[], period=None, options=None):
+    period, options = period or Period.last_month(), options or Options()
+    work_files, chunk_size, work_format, exact = options.work_files, options.chunk_size, options.work_format, options.exact
+    tags = {'report': 'loan'} | ({'period': period.name} if period.key else {})
     # create directories if not exist
-    if not os.path.exists('iss_import_loan/work_files'):
-        os.makedirs('iss_import_loan/work_files')
-    # create empty dataframes inside a dictionary based on given branch names to fill branch data later
-    df_dic = {}
-    for br_code in br_codes:
-        df_dic[br_code] = {}
-    # get same month adjusted data in dataframe
-    same_m_adjust_df = same_m_adjustments('RAW_BO', br_codes)
-    # define required general variables for branchwise calculation
+    workdir = period.output('iss_import_loan', 'work_files')
+    if not os.path.exists(workdir):
+        os.makedirs(workdir)
+    # get same month adjusted amount and balance sheet of each branch
+    bo_dir = period.input('RAW_BO')
+    same_m_file = [os.path.join(bo_dir, file) for file in os.listdir(bo_dir) if 'same month' in file.lower()][0]
+    same_m_adjusted = graph.add(period.task('same_m_adjusted'), same_m_amounts, bo_dir, br_codes, chunk_size, exact, process=True,
+                                inputs=[same_m_file], tags=tags)
+    gl_tasks = branch_gl_tasks(graph, br_codes, period, exact)
+    # calculate loan catagories of changed branches at once, kept in result store branch by branch so unchanged branches
+    # are not calculated again
+    loan_matrices = [graph.add(period.task(f'loan_matrix_{br_code}'), derive_loan_matrices, br_code, gl_task, same_m_adjusted,
+                               batch=period.task('loan_matrix'), tags=tags | {'branch': br_code})
+                     for br_code, gl_task in zip(br_codes, gl_tasks)]
+    # export data branchwise
+    work_file_tasks = [graph.add(period.task(f'loan_work_file_{br_code}'), loan_work_file, br_code, loan_matrix, workdir,
+                                 work_format, process=True, outputs=[os.path.join(workdir, f'iss_{br_code}.{work_format}')],
+                                 tags=tags | {'branch': br_code})
+                       for br_code, loan_matrix in zip(br_codes, loan_matrices) if work_files]
+    outfile = period.output('iss_import_loan', f'ISS_Import-Loan_{period.name}.{options.report_format}')
+    return graph.add(period.task('loan_report'), import_loan_report, loan_matrices, exclude_br, outfile, after=work_file_tasks,
+                     outputs=[outfile], tags=tags)
+
+# function to export final loan report from loan matrices of branches
+def import_loan_report(loan_matrices, exclude_br=[], outfile='iss_import_loan/ISS_Import-Loan.xlsx'):
+    df_main_sums = pd.concat([df_main_sum for df_merged, df_main_sum, df_other_sum in loan_matrices], axis=1)
+    # combine all branch data for final report
+    df_final = consolidate(df_main_sums, exclude_br)
+    # export final output result in excel
+    export_report(df_final, outfile)
+
+# function to add tasks loading balance sheet of each branch, once for all reports with GLs required by any of them
+def branch_gl_tasks(graph, br_codes, period, exact=False):
+    sheet_dir = period.input('BAL_SHEET')
+    files = os.listdir(sheet_dir)
+    urls = [[os.path.join(sheet_dir, file) for file in files if 'BALSHEETBRN' and br_code in file][0] for br_code in br_codes]
+    tags = {'report': 'input'} | ({'period': period.name} if period.key else {})
+    return [graph.add(period.task(f'gl_{br_code}'), load_gl, url, branch_gl_codes(), exact, process=True, inputs=[url], store=False,
+                      tags=tags | {'branch': br_code}, prefetch=True)
+            for br_code, url in zip(br_codes, urls)]
+
+# function to run tasks of a single report, raising its error if any
+def run_report(report_tasks, br_codes, exclude_br=[], period=None, options=None):
+    options = options or Options()
+    graph = TaskGraph(options.workers, ResultStore(store_dir), job_dir=options.job_dir)
+    report = report_tasks(graph, br_codes, exclude_br, period, options)
+    graph.run()
+    if report.error:
+        raise report.error
+
+# function to get loan catagories of each GL with report, particular, segment and balance type, built once for all periods
+@cache
+def loan_gl_index():
     # main loan catagories
     particulars = ['Total PAD (General)', 'Total PAD (Capitalized)', 'Total PAD (EDF)', 'Total LTR/MPI',
                     'Total LIM', 'Total Loan Disbursed and Settled within this Month',
@@ -46,12 +170,6 @@ def iss_import_loan(br_codes, exclude_br=[]):
     main_sme_gl_int = [150420006, 150420047, 150420012, 150420010, pd.NA, pd.NA, pd.NA, pd.NA, pd.NA, pd.NA,]
     main_corp_gl_int_sus = [150820005, 150820039, 150820011, 150820009, pd.NA, pd.NA, pd.NA, pd.NA, pd.NA, pd.NA,]
     main_sme_gl_int_sus = [150820006, 150820045, 150820012, 150820010, pd.NA, pd.NA, pd.NA, pd.NA, pd.NA, pd.NA,]
-    df_main = pd.DataFrame(
-        {
-        'Particulars': particulars + particulars + particulars + particulars + particulars + particulars,
-        'GL Code': main_corp_gl_pp + main_sme_gl_pp + main_corp_gl_int + main_sme_gl_int + main_corp_gl_int_sus + main_sme_gl_int_sus
-        }
-    )
     # other loan catagories
     other_particulars = ['Import Loan', 'Import Loan (Capitalized)', 'Time Loan (new)',
                         'Time Loan (old)', 'Time Loan Amortized', 'Time Loan (Capitalized)',
@@ -69,134 +187,230 @@ def iss_import_loan(br_codes, exclude_br=[]):
                         150830025, 150830001, 150830027, 150830019, pd.NA,]
     other_sme_gl_int_sus = [150820008, 150820044, 150820025, 150820004, '', 150820049,
                         pd.NA, 150830002, pd.NA, 150830020, pd.NA,]
-    df_other = pd.DataFrame(
-        {
-        'Loan Type': other_particulars + other_particulars + other_particulars +
-                    other_particulars + other_particulars + other_particulars,
-        'GL Code': other_corp_gl_pp + other_sme_gl_pp + other_corp_gl_int + other_sme_gl_int +
-                    other_corp_gl_int_sus + other_sme_gl_int_sus
-        }
-    )
-    # get relevant GL html files
-    files = os.listdir('BAL_SHEET')
-    # convert html files into excel files and calculate from dataframes
-    for br_code in br_codes:
-        # find relevant html file based on name from input list
-        url = [f'BAL_SHEET/{file}' for file in files if 'BALSHEETBRN' and br_code in file][0]
-        # convert html to excel
-        df_dic[br_code] = html_to_xl(url=url, table_range=slice(1,-1),
-                            cols=['Level', 'Leaf', 'GL Code', 'GL Description',
-                            'FCY Balance', 'LCY Balance', 'Total'],
-                            ignore_list=['Leaf', 'GL Description'])
-        # calculation of other loan catagories
-        df_other_all = derive_loan_amount(df_other, df_dic[br_code], 'Loan Type')
-        df_other_merged = df_other_all[0]
-        df_other_sum = df_other_all[1]
-        other_total = df_other_sum['Total'].sum()
-        df_other_sum.loc['Total Amount'] = [other_total]
-        # calculation of main loan catagories
-        df_main_all = derive_loan_amount(df_main, df_dic[br_code], 'Particulars')
-        df_main_merged = df_main_all[0]
-        df_main_sum = df_main_all[1]
-        df_main_sum.loc['Other Loans'] = [other_total]
-        # get same month adjusted data for each relevant branch and add data to its main summary
-        same_m_adjusted = same_m_adjust_df.loc[same_m_adjust_df['BR.'].isin([br_code]), 'LCY_AMOUNT'].sum()
-        df_main_sum.loc['Total Loan Disbursed and Settled within this Month'] = [same_m_adjusted]
-        # assign branch data to relevant branch and export data branchwise
-        df_dic[br_code] = df_main_sum
-        with pd.ExcelWriter(f'iss_import_loan/work_files/iss_{br_code}.xlsx', engine='openpyxl') as writer:
-            df_main_sum.to_excel(writer, sheet_name='Main_Summary', float_format='%.2f')
-            df_other_sum.to_excel(writer, sheet_name='Other_Summary', float_format='%.2f')
-            df_main_merged.to_excel(writer, sheet_name='Main_Details', index=False, float_format='%.2f')
-            df_other_merged.to_excel(writer, sheet_name='Other_Details', index=False, float_format='%.2f')
-            sheetnames = ['Main_Summary', 'Other_Summary', 'Main_Details', 'Other_Details']
-            for sheetname in sheetnames:
-                sheet = writer.sheets[sheetname]
-                auto_column_width(sheet, df_main_sum)
-                auto_column_width(sheet, df_other_sum)
-                auto_column_width(sheet, df_main_merged)
-                auto_column_width(sheet, df_other_merged)
-    # combine all branch data for final report
-    df_final = pd.concat([df_dic[i] for i in br_codes], axis=1)
-    df_final.columns = br_codes
-    for br in exclude_br: #fillna blank column data for excluded branches
-        df_final[br] = pd.NA
-    df_final = df_final[sorted(df_final.columns)] #sort columns branchwise
-    df_final['Main Operation'] = df_final.sum(axis=1, numeric_only=True)
-    particulars.append('Other Loans')
-    df_final.insert(0, 'Particulars', particulars)
-    # export final output result in excel
-    with pd.ExcelWriter(f'iss_import_loan/ISS_Import-Loan_{report_period}.xlsx', engine='openpyxl') as writer:
-        df_final.to_excel(writer, float_format='%.2f', index=False)
-        # beautify output
-        sheet = writer.sheets['Sheet1']
-        auto_column_width(sheet, df_final)
-        sheet.column_dimensions['A'].width = 55
-        col_list = [chr(i) for i in range(ord('B'), ord('Z'))]
-        for col in col_list:
-            for cell in sheet[col]:
-                cell.number_format = '#,##0.00'
-
-# function to get data for loans adjusted within the same month of creation
-def same_m_adjustments(indir, br_codes):
+    gl_lists = {
+        'main': [main_corp_gl_pp, main_sme_gl_pp, main_corp_gl_int, main_sme_gl_int, main_corp_gl_int_sus, main_sme_gl_int_sus],
+        'other': [other_corp_gl_pp, other_sme_gl_pp, other_corp_gl_int, other_sme_gl_int, other_corp_gl_int_sus, other_sme_gl_int_sus],
+    }
+    # create one row for each catagory & GL in the same order as GL lists
+    rows = []
+    for report, report_particulars in [('main', particulars), ('other', other_particulars)]:
+        for (balance, segment), gl_list in zip([(balance, segment) for balance in ['Principal', 'Interest', 'Suspense']
+                                                for segment in ['Corporate', 'SME']], gl_lists[report]):
+            rows += [[report, particular, segment, balance, gl_code] for particular, gl_code in zip(report_particulars, gl_list)]
+    return pd.DataFrame(rows, columns=['Report', 'Particulars', 'Segment', 'Balance', 'GL Code'])
+
+# function to get all GL codes required from branch balance sheets
+@cache
+def branch_gl_codes():
+    gl_codes = [gl_code for gl_code in loan_gl_index()['GL Code'] if isinstance(gl_code, int)]
+    return sorted(set(gl_codes + ldbp_gl + local_bills_gl))
+
+# function to derive loan amount of all branches with one merge of stacked balance sheets and GL index
+@staged('derive loan amount')
+def derive_loan_matrix(df_index, gl_dic, same_m_adjusted):
+    br_codes = list(gl_dic)
+    # stack branch balance sheets into one long dataframe with a branch column
+    df_long = pd.concat(gl_dic, names=['Branch', None])[['GL Code', 'GL Description', 'Total']].reset_index(level='Branch')
+    # every catagory row for every branch joined with GLs of that branch
+    df_cross = df_index.merge(pd.DataFrame({'Branch': br_codes}), how='cross')
+    df_merged = df_cross.merge(df_long, on=['Branch', 'GL Code'], how='left')
+    df_sum = df_merged.groupby(['Report', 'Particulars', 'Branch'], sort=False)['Total'].sum().unstack('Branch')
+    df_sum = df_sum.reindex(index=pd.MultiIndex.from_frame(df_index[['Report', 'Particulars']].drop_duplicates()), columns=br_codes)
+    # summary of other loan catagories with total amount
+    df_other_sums = df_sum.loc['other'].copy()
+    df_other_sums.loc['Total Amount'] = df_other_sums.sum()
+    df_other_sums.index.name = 'Loan Type'
+    # summary of main loan catagories with other loans and same month adjusted data
+    df_main_sums = df_sum.loc['main'].copy()
+    df_main_sums.loc['Other Loans'] = df_other_sums.loc['Total Amount']
+    # set branch by branch, as pandas fails setting a row of a frame with one nullable integer column for exact amounts
+    for br_code, amount in same_m_adjusted.reindex(br_codes).items():
+        df_main_sums.loc['Total Loan Disbursed and Settled within this Month', br_code] = amount
+    return df_merged, df_main_sums, df_other_sums
+
+# function to derive loan matrix of given branches with one merge, returns loan matrix of each branch
+def derive_loan_matrices(branches):
+    gl_dic = {br_code: df_gl for br_code, df_gl, same_m_adjusted in branches}
+    df_merged, df_main_sums, df_other_sums = derive_loan_matrix(loan_gl_index(), gl_dic, branches[0][2])
+    return [(df_merged.loc[df_merged['Branch'] == br_code], df_main_sums[[br_code]], df_other_sums[[br_code]])
+            for br_code in gl_dic]
+
+# function to derive loan matrix of a single branch from its balance sheet, for calculating branches one by one
+def derive_loan_amount(br_code, df_br, same_m_adjusted):
+    return derive_loan_matrices([(br_code, df_br, same_m_adjusted)])[0]
+
+# function to export work file of a single branch with loan summaries and details
+def export_loan_branch(br_code, df_main_sum, df_other_sum, df_main_merged, df_other_merged, workdir='iss_import_loan/work_files',
+                       work_format='xlsx'):
+    df_main_sum = df_main_sum.set_axis(['Total'], axis=1)
+    df_other_sum = df_other_sum.set_axis(['Total'], axis=1)
+    df_main_merged = df_main_merged[['Particulars', 'GL Code', 'GL Description', 'Total']]
+    df_other_merged = df_other_merged[['Particulars', 'GL Code', 'GL Description', 'Total']].rename(columns={'Particulars': 'Loan Type'})
+    with OutputFile(os.path.join(workdir, f'iss_{br_code}.{work_format}')) as work_file:
+        work_file.add(df_main_sum, 'Main_Summary', index=True)
+        work_file.add(df_other_sum, 'Other_Summary', index=True)
+        work_file.add(df_main_merged, 'Main_Details')
+        work_file.add(df_other_merged, 'Other_Details')
+
+# function to export work file of a single branch from its loan matrix
+def loan_work_file(br_code, loan_matrix, workdir='iss_import_loan/work_files', work_format='xlsx'):
+    df_merged, df_main_sums, df_other_sums = loan_matrix
+    df_br = df_merged.loc[df_merged['Branch'] == br_code]
+    export_loan_branch(br_code, df_main_sums[[br_code]], df_other_sums[[br_code]],
+                       df_br.loc[df_br['Report'] == 'main'], df_br.loc[df_br['Report'] == 'other'], workdir, work_format)
+
+# function to get GL dataframe from a balance sheet html file, only with given GL codes if any
+@staged('read balance sheet')
+def load_gl(url, gl_codes=None, exact=False):
+    return read_balance_sheet(url=url, table_range=slice(1,-1),
+                    cols=['Level', 'Leaf', 'GL Code', 'GL Description', 'FCY Balance', 'LCY Balance', 'Total'],
+                    ignore_list=['Leaf', 'GL Description'], gl_codes=gl_codes, cache_dir=cache_dir,
+                    paisa_cols=['FCY Balance', 'LCY Balance', 'Total'] if exact else [])
+
+# function to get dtype of BO amount columns, whole paisa if amounts are exact
+def amount_dtype(exact=False):
+    return 'paisa' if exact else 'float64'
+
+# loan products of same month adjusted report
+same_m_products = ['L035', 'L041', 'L044', 'L047', 'L060', 'L061', 'L062', 'L063', 'L064', 'L072', 'L073', 'L076', 'L223', 'L226',
+                   'L233']
+# product codes of 508 bills not counted
+bill_ignore = ['IB02', 'IB06', 'IB13', 'IB52', 'IB56', 'IB63', 'IB66']
+
+# function to get arguments reading a BO report by hint of its file name, full report for work files else only required
+# columns & rows of the report dates; shared by report tasks and watch mode, so a BO parsed on arrival is the cached
+# dataframe reports read
+def bo_args(hint, work_files=True, exact=False, first_date=None, balance_date=None):
+    amount = amount_dtype(exact)
+    if hint == 'same month':
+        return {'key_id': 'PRODUCT_CODE', 'usecols': ['PRODUCT_CODE', 'RELATED_ACCOUNT', 'LCY_AMOUNT'],
+                'dtype': {'RELATED_ACCOUNT': str, 'LCY_AMOUNT': amount}, 'filters': [('PRODUCT_CODE', 'in', same_m_products)]}
+    if hint == 'bills':
+        return {'key_id': 'Cont. Ref  No.', 'row_index': 3, 'code': slice(3,7), 'row_ignore': bill_ignore,
+                'usecols': None if work_files else ['Cont. Ref  No.', 'Contract No.', 'LCY Balance'],
+                'dtype': {'Cont. Ref  No.': str, 'Contract No.': str, 'LCY Balance': amount}}
+    if hint == '603r':
+        return {'key_id': 'Contract Ref No', 'row_index': 4, 'code': slice(0,3),
+                'usecols': None if work_files else ['Contract Ref No', 'Accept Dt.', 'OPC', 'CUR', 'Bill Outstanding LCY'],
+                'dtype': {'Contract Ref No': str, 'Bill Outstanding LCY': amount}}
+    if hint == 'mautured':
+        filters = [('OPERATION', 'in', ['DIS']), ('MATURITY_DATE', '>=', pd.Timestamp(first_date)),
+                   ('MATURITY_DATE', '<=', pd.Timestamp(balance_date))]
+        return {'key_id': 'USER_REF_NO', 'row_index': 4, 'code': slice(4,7),
+                'usecols': None if work_files else ['USER_REF_NO', 'MATURITY_DATE', 'OPERATION', 'LCY_AMOUNT'],
+                'dtype': {'USER_REF_NO': str, 'LCY_AMOUNT': amount}, 'filters': [] if work_files else filters}
+    if hint == 'overdue local':
+        filters = [('Opn', 'in', ['DIS']), ('Maturity Date', '<=', pd.Timestamp(balance_date))]
+        return {'key_id': 'User Ref', 'row_index': 5, 'code': slice(4,7),
+                'usecols': None if work_files else ['User Ref', 'Opn', 'Maturity Date', 'Ccy', 'Bill Amt'],
+                'dtype': {'User Ref': str, 'Bill Amt': amount}, 'filters': [] if work_files else filters}
+    raise ValueError(f"No BO report for '{hint}'")
+
+# function to get data for loans adjusted within the same month of creation, as chunks of given rows if any
+def same_m_adjustments(indir, br_codes, chunk_size=0, exact=False):
     # get input filename from hint
     bo_files = os.listdir(indir)
     infile = [file for file in bo_files if 'same month' in file.lower()][0]
-    df = pd.read_excel(f'{indir}/{infile}', sheet_name='Report1', header=2, ).dropna(subset=['PRODUCT_CODE'])
-    df['BR.'] = df['RELATED_ACCOUNT'].str[:3]
+    # read only required columns and rows of required products
+    args = bo_args('same month', exact=exact)
+    if chunk_size:
+        chunks = read_bo_chunks(f'{indir}/{infile}', chunk_size=chunk_size, **args)
+        return (same_m_branches(df, br_codes, same_m_products) for df in chunks)
+    df = read_bo(f'{indir}/{infile}', cache_dir=cache_dir, **args)
+    return same_m_branches(df, br_codes, same_m_products)
+
+# function to keep same month adjusted loans of given branches and products
+def same_m_branches(df, br_codes, product_codes):
+    df = df.dropna(subset=['PRODUCT_CODE'])
+    df['BR.'] = df['RELATED_ACCOUNT'].str[:3].astype('category')
     br_list = list(df['BR.'].unique())
     br_list = [br_code for br_code in br_list if br_code in br_codes]
-    product_codes = ['L035', 'L041', 'L044', 'L047', 'L060', 'L061', 'L062', 'L063', 'L064', 'L072', 'L073', 'L076', 'L223', 'L226', 'L233']
     df = df.loc[df['BR.'].isin(br_list) & df['PRODUCT_CODE'].isin(product_codes)]
     return df
 
-# function to derive loan amount from GL for each branch
-def derive_loan_amount(df_cat, df_br, index):
-    df_cat_merged = pd.merge(df_cat, df_br, on='GL Code', how='left').drop(['Level', 'Leaf', 'FCY Balance', 'LCY Balance'], axis=1)
-    df_cat_sum = df_cat_merged.pivot_table(values='Total', index=index, aggfunc='sum', sort=False)
-    return df_cat_merged, df_cat_sum
+# function to get same month adjusted amount of each branch, adding up chunks of given rows if any
+def same_m_amounts(indir, br_codes, chunk_size=0, exact=False):
+    if chunk_size:
+        same_m_adjusted, = sum_chunks(same_m_adjustments(indir, br_codes, chunk_size, exact),
+                                      lambda df: branch_pivot(df, 'BR.', 'LCY_AMOUNT', br_codes, paisa=True).loc['Total'], exact=exact)
+        return same_m_adjusted
+    return branch_pivot(same_m_adjustments(indir, br_codes, 0, exact), 'BR.', 'LCY_AMOUNT', br_codes).loc['Total']
 
 # function to calculate accepted bill related ISS report
-def iss_import_bill(br_codes, exclude_br=[]):
+def iss_import_bill(br_codes, exclude_br=[], period=None, options=None):
+    run_report(import_bill_tasks, br_codes, exclude_br, period, options)
+
+# function to add tasks of accepted bill related ISS report to a task graph, returns task of the final report
+def import_bill_tasks(graph, br_codes, exclude_br=[], period=None, options=None):
+    period, options = period or Period.last_month(), options or Options()
+    work_files, chunk_size, work_format, exact = options.work_files, options.chunk_size, options.work_format, options.exact
+    tags = {'report': 'bill'} | ({'period': period.name} if period.key else {})
     # create directories if not exist
-    if not os.path.exists('iss_import_bill/work_files'):
-        os.makedirs('iss_import_bill/work_files')
+    workdir = period.output('iss_import_bill', 'work_files')
+    if not os.path.exists(workdir):
+        os.makedirs(workdir)
     # get relevant files
-    files = os.listdir('RAW_BO')
-    url = [f'RAW_BO/{file}' for file in files if 'bills' in file.lower()] [0]
-    # get modified/cleaned data from 508 bills BO
-    df_bill = modify_raw(url, 'iss_import_bill/work_files/bill508.xlsx', 'Cont. Ref  No.', 
-                         row_ignore=['IB02', 'IB06', 'IB13', 'IB52', 'IB56', 'IB63', 'IB66'])
-    # create extra columns with LC and branch codes for further calculation
-    lc_code_column = pd.Series(df_bill['Contract No.'].str[6:8], index=df_bill.index)
-    br_code_column = pd.Series(df_bill['Cont. Ref  No.'].str[:3], index=df_bill.index)
-    df_bill.insert(1, 'LC Code', 'LC' + lc_code_column.astype(str))
-    df_bill.insert(2, 'Br. Code', br_code_column)
+    bo_dir = period.input('RAW_BO')
+    url = [os.path.join(bo_dir, file) for file in os.listdir(bo_dir) if 'bills' in file.lower()] [0]
+    outputs = [os.path.join(workdir, f'{name}.{work_format}') for name in ['bill508', 'bill_508']]
+    outputs = outputs if work_files and not chunk_size else []
+    bill_amounts = graph.add(period.task('bill_amounts'), import_bill_amounts, url, br_codes, work_files, chunk_size, workdir,
+                             work_format, exact, process=True, inputs=[url], outputs=outputs, tags=tags)
+    # convert html file to dataframe with the relevant acceptance bill GLs
+    sheet_dir = period.input('BAL_SHEET')
+    url = [os.path.join(sheet_dir, html) for html in os.listdir(sheet_dir) if 'BALSHEET' in html and 'BALSHEETBRN' not in html][0]
+    df_gl = graph.add(period.task('gl_all'), load_gl, url, bill_gl, exact, process=True, inputs=[url], store=False, tags=tags | {'report': 'input'},
+                      prefetch=True)
+    outfile = period.output('iss_import_bill', f'ISS_Import-Bills_{period.name}.{options.report_format}')
+    return graph.add(period.task('bill_report'), import_bill_report, bill_amounts, df_gl, exclude_br, outfile, exact,
+                     outputs=[outfile], tags=tags)
+
+# function to get amount of LC Code catagories by branch and total contingent bill amount from 508 bills BO
+def import_bill_amounts(url, br_codes, work_files=True, chunk_size=0, workdir='iss_import_bill/work_files', work_format='xlsx',
+                        exact=False):
+    # map LC Codes to catagories, so each bill is assigned a catagory once
+    lc_codes = {
+        'LC04': 'local_export', 'LC99': 'local_other',
+        'LC02': 'foreign', 'LC06': 'foreign', 'LC10': 'foreign', 'LC12': 'foreign', 'LC18': 'foreign',
+        'LC22': 'foreign', 'LC25': 'foreign', 'LC27': 'foreign',
+        'LC01': 'foreign_other', 'LC14': 'other', 'LC16': 'other',
+    }
+    if chunk_size:
+        # add up amounts of catagories and total of contingent bills chunk by chunk, work files are not written
+        chunks = modify_raw_chunks(url, chunk_size=chunk_size, **bo_args('bills', False, exact))
+        df_cat, total_amount_bo = sum_chunks(
+            map(bill_codes, chunks),
+            lambda df: branch_pivot(df, 'Br. Code', 'LCY Balance', br_codes, 'LC Code', lc_codes, paisa=True),
+            lambda df: to_paisa(df.loc[~df['Code'].isin(['IB16']), 'LCY Balance']).sum(), exact=exact)
+        return df_cat, total_amount_bo
+    # get modified/cleaned data from 508 bills BO, full report is kept in work file else only required columns
+    with OutputFile(os.path.join(workdir, f'bill508.{work_format}'), enabled=work_files) as work_file:
+        df_bill = modify_raw(url, work_file, cache_dir=cache_dir, **bo_args('bills', work_files, exact))
+    df_bill = bill_codes(df_bill)
     # export modified working file
-    with pd.ExcelWriter('iss_import_bill/work_files/bill_508.xlsx', engine='openpyxl') as writer:
-        df_bill.to_excel(writer, sheet_name='Report1', float_format='%.2f', index=False)
-        sheet = writer.sheets['Report1']
-        for cell in sheet['G']:
-            cell.number_format = 'dd-mm-yyyy;@'
-        for cell in sheet['W']:
-            cell.number_format = 'dd-mm-yyyy;@'
-        auto_column_width(sheet=sheet, dataframe=df_bill, ignore_list=['A', 'B', 'C', 'D', 'L', 'O'])
+    with OutputFile(os.path.join(workdir, f'bill_508.{work_format}'), enabled=work_files) as work_file:
+        date_cols = df_bill.select_dtypes('datetime').columns
+        work_file.add(df_bill, 'Report1', formats={col: 'dd-mm-yyyy;@' for col in date_cols})
     # separate contingent liability and get total bill amount
     df_contingent_bill = df_bill.loc[~df_bill['Code'].isin(['IB16'])]
     total_amount_bo = df_contingent_bill['LCY Balance'].sum()
-    # convert html file to excel and get GLs in the dataframe
-    htmls = os.listdir('BAL_SHEET')
-    url = [f'BAL_SHEET/{html}' for html in htmls if 'BALSHEET' in html and 'BALSHEETBRN' not in html][0]
-    df_gl = html_to_xl(url=url, table_range=slice(1,-1),
-            cols=['Level', 'Leaf', 'GL Code', 'GL Description', 'FCY Balance', 'LCY Balance', 'Total'],
-            ignore_list=['Leaf', 'GL Description'])
+    # calculate amount as per LC Code catagories for all branches at once
+    df_cat = branch_pivot(df_bill, 'Br. Code', 'LCY Balance', br_codes, 'LC Code', lc_codes)
+    return df_cat, total_amount_bo
+
+# function to create extra columns with LC and branch codes of 508 bills for further calculation
+def bill_codes(df_bill):
+    lc_code_column = pd.Series(df_bill['Contract No.'].str[6:8], index=df_bill.index)
+    br_code_column = pd.Series(df_bill['Cont. Ref  No.'].str[:3], index=df_bill.index)
+    df_bill.insert(1, 'LC Code', 'LC' + lc_code_column.astype(str))
+    df_bill.insert(2, 'Br. Code', br_code_column)
+    return df_bill
+
+# function to export final accepted bill report if bill amount from BO matches with GL
+def import_bill_report(bill_amounts, df_gl, exclude_br=[], outfile='iss_import_bill/ISS_Import-Bills.xlsx', exact=False):
+    df_cat, total_amount_bo = bill_amounts
     # get the relevant acceptance bill GLs to calculate total
-    gl_list = [501040000, 501130000, 501140000, 501180000, 501280000, 501290000]
-    total_amount_gl = df_gl.loc[df_gl['GL Code'].isin(gl_list), 'Total'].sum()
-    # create empty dataframes inside a dictionary based on given branch names to fill branch data later
-    df_dic = {}
-    for br_code in br_codes:
-        df_dic[br_code] = {}
+    total_amount_gl = df_gl.loc[df_gl['GL Code'].isin(bill_gl), 'Total'].sum()
     # define report catagories as particulars in row indices
     particulars = [
         'Accepted Bills Payable (Local)', #LC04, LC99
@@ -207,59 +421,145 @@ def iss_import_bill(br_codes, exclude_br=[]):
         'Total Acceptance Provided Against Foreign Bill', #LC02, LC06, LC10, LC12, LC22, LC25, LC27, (other- LC01)
         'Total Outstanding of Acceptance Issued Against  FB/IB/AB' #local + foreign + other
     ]
-    # calculate ISS for accepted bills if bill amount from BO matches with GL
-    if abs(total_amount_bo - total_amount_gl) < 1:
-        # define LC Codes and Bill Amount with same variable name as per report catagories
-        lc_codes = {
-            'local': ['LC04', 'LC99'], 'local_export': ['LC04'], 'local_other': ['LC99'], 
-            'foreign': ['LC02', 'LC06', 'LC10', 'LC12', 'LC18', 'LC22', 'LC25', 'LC27'], 
-            'foreign_other': ['LC01'], 'other': ['LC14', 'LC16'],
-        }
-        bill_amount = {
-            'local': 0, 'local_export': 0, 'local_other': 0, 'foreign': 0, 'foreign_other': 0, 'other': 0,
-        }
-        # calculate amount as per report catagories with given branch codes
-        for br_code in br_codes:
-            df = df_bill.loc[df_bill['Br. Code'].isin([br_code])]
-            for report_cat, lc_code in lc_codes.items():
-                bill_amount[report_cat] = df.loc[df['LC Code'].isin(lc_code), 'LCY Balance'].sum()
-            # create new dataframe with the derived data and set dataframe branchwise
-            df_main = pd.DataFrame(
-                {
-                    'Particulars': particulars,
-                    br_code: [bill_amount['local'], bill_amount['foreign'] + bill_amount['foreign_other'],
-                              bill_amount['other'], bill_amount['local_export'], bill_amount['local_other'],
-                              bill_amount['foreign'] + bill_amount['foreign_other'],  bill_amount['local'] + 
-                              bill_amount['foreign'] + bill_amount['foreign_other'] + bill_amount['other']]
-                }
-            )
-            df_dic[br_code] = df_main
-    # combine all branch data horizontally, drop columns duplicated during merge, add a total column
-    df_all = pd.concat([df_dic[i] for i in br_codes], axis=1)
-    for br in exclude_br: #fillna blank column data for excluded branches
-        df_all[br] = pd.NA
-    df_final = df_all.loc[:, ~df_all.columns.duplicated()]
-    key_col = df_final.pop(df_final.columns[0])
-    df_final = df_final[sorted(df_final.columns)] #sort columns branchwise
-    df_final.insert(0, key_col.name, key_col)
-    df_final.insert(len(df_final.columns), 'Main Operation', df_final.sum(axis=1, numeric_only=True))
+    # calculate ISS for accepted bills if bill amount from BO matches with GL, to the paisa if amounts are exact
+    if exact and total_amount_bo != total_amount_gl:
+        raise ValueError(f"Bill amount of BO ({total_amount_bo / 100:,.2f}) does not match with GL ({total_amount_gl / 100:,.2f})")
+    if abs(total_amount_bo - total_amount_gl) >= 1:
+        raise ValueError(f"Bill amount of BO ({total_amount_bo:,.2f}) does not match with GL ({total_amount_gl:,.2f})")
+    # define report catagories as sum of LC Code catagories
+    cat_weights = pd.DataFrame(
+        [[1, 1, 0, 0, 0], [0, 0, 1, 1, 0], [0, 0, 0, 0, 1], [1, 0, 0, 0, 0], [0, 1, 0, 0, 0], [0, 0, 1, 1, 0], [1, 1, 1, 1, 1]],
+        index=particulars, columns=['local_export', 'local_other', 'foreign', 'foreign_other', 'other']
+    )
+    # calculate amount as per report catagories for all branches at once
+    df_final = consolidate(cat_weights.dot(df_cat.loc[cat_weights.columns]), exclude_br)
     # export final output result in excel
-    with pd.ExcelWriter(f'iss_import_bill/ISS_Import-Bills_{report_period}.xlsx', engine='openpyxl') as writer:
-        df_final.to_excel(writer, float_format='%.2f', index=False)
-        # beautify output
-        sheet = writer.sheets['Sheet1']
-        auto_column_width(sheet, df_final)
-        sheet.column_dimensions['A'].width = 55
-        col_list = [chr(i) for i in range(ord('B'), ord('Z'))]
-        for col in col_list:
-            for cell in sheet[col]:
-                cell.number_format = '#,##0.00'
+    export_report(df_final, outfile)
 
 # function to calculate export bill related ISS report
-def iss_export_bill(br_codes, exclude_br=[]):
+def iss_export_bill(br_codes, exclude_br=[], period=None, options=None):
+    run_report(export_bill_tasks, br_codes, exclude_br, period, options)
+
+# function to add tasks of export bill related ISS report to a task graph, returns task of the final report
+def export_bill_tasks(graph, br_codes, exclude_br=[], period=None, options=None):
+    period, options = period or Period.last_month(), options or Options()
+    work_files, chunk_size, work_format, exact = options.work_files, options.chunk_size, options.work_format, options.exact
+    tags = {'report': 'export'} | ({'period': period.name} if period.key else {})
     # create directories if not exist
-    if not os.path.exists('iss_export_bill/work_files'):
-        os.makedirs('iss_export_bill/work_files')
+    workdir = period.output('iss_export_bill', 'work_files')
+    if not os.path.exists(workdir):
+        os.makedirs(workdir)
+    # get BO files, report dates are of the period
+    bo_dir = period.input('RAW_BO')
+    bo_files = os.listdir(bo_dir)
+    bo_603 = [os.path.join(bo_dir, file) for file in bo_files if '603r' in file.lower()][0]
+    bo_matured = [os.path.join(bo_dir, file) for file in bo_files if 'mautured' in file.lower()][0]
+    bo_625 = [os.path.join(bo_dir, file) for file in bo_files if 'overdue local' in file.lower()][0]
+    # get particular 1,6,7 from BO 603R, particular 4 from BO ACCEPTANCE MATURED, particular 5 from BO 625
+    outputs = {name: [os.path.join(workdir, f'{name}.{work_format}')] if work_files else []
+               for name in ['603R', '603F', 'matured', '625A']}
+    local_bills = graph.add(period.task('local_bills'), export_local_bills, bo_603, br_codes, work_files, chunk_size, workdir,
+                            work_format, exact, process=True, inputs=[bo_603],
+                            outputs=outputs['603R'] + outputs['603F'] if not chunk_size else [], tags=tags)
+    matured_acceptance = graph.add(period.task('matured_acceptance'), export_matured_bills, bo_matured, br_codes, period.first_date,
+                                   period.balance_date, work_files, workdir, work_format, exact, process=True, inputs=[bo_matured],
+                                   outputs=outputs['matured'], tags=tags)
+    overdue_bills = graph.add(period.task('overdue_bills'), export_overdue_bills, bo_625, exrate_task(graph, period), br_codes,
+                              period.balance_date, work_files, workdir, work_format, exact, process=True, inputs=[bo_625],
+                              outputs=outputs['625A'], tags=tags)
+    # get particular 2,3,8 from balance sheet of each branch
+    gl_amounts = [graph.add(period.task(f'export_gl_{br_code}'), export_bill_branch, df_br, tags=tags | {'branch': br_code})
+                  for br_code, df_br in zip(br_codes, branch_gl_tasks(graph, br_codes, period, exact))]
+    outfile = period.output('iss_export_bill', f'ISS_Export-Local_{period.name}.{options.report_format}')
+    return graph.add(period.task('export_report'), export_bill_report, br_codes, local_bills, matured_acceptance, overdue_bills,
+                     gl_amounts, exclude_br, outfile, exact, outputs=[outfile], tags=tags)
+
+# function to add task reading exchange rates of a period, from its own BO directory else shared by all periods in the root
+# of period directories, the shared file having one task so it is read once
+def exrate_task(graph, period):
+    exrate_file, name = period.input('RAW_BO', 'Ex-Rate.xlsx'), period.task('exrate')
+    if period.key and not os.path.exists(exrate_file):
+        exrate_file, name = os.path.normpath(os.path.join(period.indir, os.pardir, 'Ex-Rate.xlsx')), 'exrate_shared'
+    return graph.add(name, pd.read_excel, exrate_file, inputs=[exrate_file], store=False, tags={'report': 'input'},
+                     prefetch=True)
+
+# function to get accepted local bills and bills in foreign currency of each branch from BO 603R
+def export_local_bills(bo_603, br_codes, work_files=True, chunk_size=0, workdir='iss_export_bill/work_files', work_format='xlsx',
+                       exact=False):
+    if chunk_size:
+        # add up branch amounts chunk by chunk, 603R work files are not written
+        chunks = modify_raw_chunks(bo_603, chunk_size=chunk_size, **bo_args('603r', False, exact))
+        return sum_chunks(
+            chunks,
+            lambda df: branch_pivot(accepted_local_bills(df), 'Code', 'Bill Outstanding LCY', br_codes, paisa=True).loc['Total'],
+            lambda df: branch_pivot(foreign_currency_bills(df, br_codes), 'Code', 'Bill Outstanding LCY', br_codes, paisa=True).loc['Total'],
+            exact=exact)
+    # work files are written once after adding all branch sheets
+    work_603r, work_603f = [OutputFile(os.path.join(workdir, f'{outfile}.{work_format}'), enabled=work_files) for outfile in ['603R', '603F']]
+    df_603r = modify_raw(bo_603, work_603r, cache_dir=cache_dir, **bo_args('603r', work_files, exact))
+    df_603_mod = accepted_local_bills(df_603r)
+    df_603_foreign = foreign_currency_bills(df_603r, br_codes)
+    local_bills_outstanding = branch_pivot(df_603_mod, 'Code', 'Bill Outstanding LCY', br_codes).loc['Total']
+    local_bills_foreign_currency = branch_pivot(df_603_foreign, 'Code', 'Bill Outstanding LCY', br_codes).loc['Total']
+    branch_work_file(work_603r, df_603_mod, local_bills_outstanding, br_codes)
+    branch_work_file(work_603f, df_603_foreign, local_bills_foreign_currency, br_codes)
+    return local_bills_outstanding, local_bills_foreign_currency
+
+# function to get accepted 603R bills not for collection, for accepted bills receivable
+def accepted_local_bills(df_603r):
+    df_603 = df_603r.dropna(subset='Accept Dt.')
+    return df_603.loc[~df_603['OPC'].isin(['COL']) & ~df_603['Accept Dt.'].astype(str).str.match(r'^[Dd]\w+')]
+
+# function to get 603R bills of given branches in foreign currency
+def foreign_currency_bills(df_603r, br_codes):
+    return df_603r.loc[df_603r['Code'].isin(br_codes) & ~df_603r['CUR'].isin(['BDT'])]
+
+# function to get acceptance matured within the year of each branch from BO ACCEPTANCE MATURED
+def export_matured_bills(bo_matured, br_codes, first_date, balance_date, work_files=True, workdir='iss_export_bill/work_files',
+                         work_format='xlsx', exact=False):
+    work_matured = OutputFile(os.path.join(workdir, f'matured.{work_format}'), enabled=work_files)
+    # work files keep full reports, else rows are filtered by operation & date while reading
+    df_matured = modify_raw(bo_matured, work_matured, cache_dir=cache_dir,
+                            **bo_args('mautured', work_files, exact, first_date, balance_date))
+    df_matured = df_matured.assign(MATURITY_DATE=pd.to_datetime(df_matured['MATURITY_DATE']))
+    matured_date = (df_matured['MATURITY_DATE'] >= first_date) & (df_matured['MATURITY_DATE'] <= balance_date)
+    df_matured_mod = df_matured.loc[df_matured['OPERATION'].isin(['DIS']) & matured_date]
+    matured_acceptance = branch_pivot(df_matured_mod, 'Code', 'LCY_AMOUNT', br_codes).loc['Total']
+    branch_work_file(work_matured, df_matured_mod, matured_acceptance, br_codes)
+    return matured_acceptance
+
+# function to get overdue local bills of each branch in local currency from BO 625
+def export_overdue_bills(bo_625, df_exrate, br_codes, balance_date, work_files=True, workdir='iss_export_bill/work_files',
+                         work_format='xlsx', exact=False):
+    work_625 = OutputFile(os.path.join(workdir, f'625A.{work_format}'), enabled=work_files)
+    df_625 = modify_raw(bo_625, work_625, cache_dir=cache_dir, **bo_args('overdue local', work_files, exact, balance_date=balance_date))
+    df_625_mod = df_625.loc[df_625['Opn'].isin(['DIS']) & (df_625['Maturity Date'] <= balance_date)]
+    df_625_mod = df_625_mod.merge(df_exrate, how='left', on='Ccy')
+    df_625_mod['LCY_AMOUNT'] = df_625_mod['Bill Amt'] * df_625_mod['Ex. Rate']
+    if exact: #each bill converted to whole paisa
+        df_625_mod['LCY_AMOUNT'] = df_625_mod['LCY_AMOUNT'].round().astype(paisa_dtype)
+    overdue_bills = branch_pivot(df_625_mod, 'Code', 'LCY_AMOUNT', br_codes).loc['Total']
+    branch_work_file(work_625, df_625_mod, overdue_bills, br_codes)
+    return overdue_bills
+
+# function to add branchwise data to work file as separate sheets for branches with amount, and write it
+def branch_work_file(work_file, df, amounts, br_codes):
+    df_groups = dict(list(df.groupby('Code', observed=True)))
+    for br_code in [br_code for br_code in br_codes if amounts[br_code] != 0]:
+        work_file.add(df_groups[br_code], br_code)
+    work_file.save()
+
+# function to get GL amounts of a single branch for export bill report
+def export_bill_branch(df_br):
+    # get particular 2,3 from GL
+    ldbp_outstanding = df_br.loc[df_br['GL Code'].isin(ldbp_gl), 'Total'].sum()
+    # get particular 8 from GL
+    local_bills_collection = df_br.loc[df_br['GL Code'].isin(local_bills_gl), 'Total'].sum()
+    return ldbp_outstanding, local_bills_collection
+
+# function to export final export bill report from amounts of BO and GL
+def export_bill_report(br_codes, local_bills, matured_acceptance, overdue_bills, gl_amounts, exclude_br=[],
+                       outfile='iss_export_bill/ISS_Export-Local.xlsx', exact=False):
     # define required particulars
     particulars = ['Accepted Bills Receivable (Local)', 'Total Loan Outstanding Against IBP/LDBP',
                     'Total Outstanding of Acceptance Received from Other Bank/branch Against  FBP/IBP/ABP',
@@ -267,162 +567,326 @@ def iss_export_bill(br_codes, exclude_br=[]):
                     'Unrealized Acceptance Receivable from Other Bank/branch Against  FBP/IBP/ABP',
                     'Total Foreign Currency in Transit', 'Total Foreign Exchange Holding',
                     'BILLS FOR COLLECTION (INLAND BILL SME+CORP)']
-    # create empty dataframes inside a dictionary based on given branch names
-    df_dic = {}
-    for br_code in br_codes:
-        df_dic[br_code] = {}
-    # get BO files, GL html files and related gl headers
-    bo_files = os.listdir('RAW_BO')
-    bo_603 = [f"RAW_BO/{file}" for file in bo_files if '603r' in file.lower()][0]
-    df_603r = modify_raw(bo_603, 'iss_export_bill/work_files/603R.xlsx', 'Contract Ref No', row_index=4, col_required=True, code=slice(0,3))
-    df_603 = df_603r.dropna(subset='Accept Dt.')
-    df_603_mod = df_603.loc[~df_603['OPC'].isin(['COL']) & ~df_603['Accept Dt.'].str.match('^[Dd]\w+')]
-    bo_matured = [f"RAW_BO/{file}" for file in bo_files if 'mautured' in file.lower()][0]
-    df_matured = modify_raw(bo_matured, 'iss_export_bill/work_files/matured.xlsx', 'USER_REF_NO', row_index=4, col_required=True, code=slice(4,7))
-    balance_date = datetime.strftime(datetime.today().replace(day=1)-timedelta(days=1), '%Y-%m-%d')
-    first_date = datetime.strftime(datetime.today().replace(day=1, month=1), '%Y-%m-%d')
-    df_matured['MATURITY_DATE'] = pd.to_datetime(df_matured['MATURITY_DATE'])
-    matured_date = (df_matured['MATURITY_DATE'] >= first_date) & (df_matured['MATURITY_DATE'] <= balance_date)
-    df_matured_mod = df_matured.loc[df_matured['OPERATION'].isin(['DIS']) & matured_date]
-    bo_625 = [f"RAW_BO/{file}" for file in bo_files if 'overdue local' in file.lower()][0]
-    df_625 = modify_raw(bo_625, 'iss_export_bill/work_files/625A.xlsx', 'User Ref', row_index=5, col_required=True, code=slice(4,7))
-    df_625_mod = df_625.loc[df_625['Opn'].isin(['DIS']) & (df_625['Maturity Date'] <= balance_date)]
-    df_exrate = pd.read_excel('RAW_BO/Ex-Rate.xlsx')
-    df_625_mod = df_625_mod.merge(df_exrate, how='left', on='Ccy')
-    df_625_mod['LCY_AMOUNT'] = df_625_mod['Bill Amt'] * df_625_mod['Ex. Rate']
-    files = os.listdir('BAL_SHEET')
-    ldbp_gl = [150120019, 150120020, 150120028, 150420019, 150420020, 150420028, 150820027, 150120031, 150420031]
-    local_bills_gl = [501240000, 501250000]
-    # convert html files into excel format and calculate further from dataframe
-    for br_code in br_codes:
-        url = [f"BAL_SHEET/{file}" for file in files if 'BALSHEETBRN' and br_code in file][0]
-        df_dic[br_code] = html_to_xl(url=url, table_range=slice(1,-1),
-                            cols=['Level', 'Leaf', 'GL Code', 'GL Description',
-                            'FCY Balance', 'LCY Balance', 'Total'],
-                            ignore_list=['Leaf', 'GL Description'])
-        # get particular 1 from BO 603R
-        df_local_bills = df_603_mod.loc[df_603_mod['Code'].isin([br_code])]
-        local_bills_outstanding = df_local_bills['Bill Outstanding LCY'].sum()
-        # get particular 2,3 from GL
-        ldbp_outstanding = df_dic[br_code].loc[df_dic[br_code]['GL Code'].isin(ldbp_gl), 'Total'].sum()
-        # get particular 4 from BO ACCEPTANCE MATURED
-        df_matured_bills = df_matured_mod.loc[df_matured_mod['Code'].isin([br_code])]
-        matured_acceptance = df_matured_bills['LCY_AMOUNT'].sum()
-        # get particular 5 from BO 625
-        df_overdue_bills = df_625_mod.loc[df_625_mod['Code'].isin([br_code])]
-        overdue_bills = df_overdue_bills['LCY_AMOUNT'].sum()
-        # get particular 6,7 from BO 603R
-        df_local_bills_foreign_currency = df_603r.loc[df_603r['Code'].isin([br_code]) & ~df_603r['CUR'].isin(['BDT'])]
-        local_bills_foreign_currency = df_local_bills_foreign_currency['Bill Outstanding LCY'].sum()
-        # get particular 8 from GL
-        local_bills_collection = df_dic[br_code].loc[df_dic[br_code]['GL Code'].isin(local_bills_gl), 'Total'].sum()
-        # create dataframe with respective data and set to dictionary
-        df_dic[br_code] = pd.DataFrame(
-            {
-            'Particulars': particulars,
-            br_code: [local_bills_outstanding, ldbp_outstanding, ldbp_outstanding, matured_acceptance, overdue_bills,
-                        local_bills_foreign_currency, local_bills_foreign_currency, local_bills_collection]
-            }
-        )
-        # add branchwise data to excel file as separate sheets
-        if local_bills_outstanding != 0:
-            with pd.ExcelWriter('iss_export_bill/work_files/603R.xlsx', engine='openpyxl', mode='a') as writer:
-                df_local_bills.to_excel(writer, sheet_name=br_code, float_format='%.2f', index=False)
-        if matured_acceptance != 0:
-            with pd.ExcelWriter('iss_export_bill/work_files/matured.xlsx', engine='openpyxl', mode='a') as writer:
-                df_matured_bills.to_excel(writer, sheet_name=br_code, float_format='%.2f', index=False)
-        if overdue_bills != 0:
-            with pd.ExcelWriter('iss_export_bill/work_files/625A.xlsx', engine='openpyxl', mode='a') as writer:
-                df_overdue_bills.to_excel(writer, sheet_name=br_code, float_format='%.2f', index=False)
-        if local_bills_foreign_currency != 0:
-            with pd.ExcelWriter('iss_export_bill/work_files/603F.xlsx', engine='openpyxl') as writer:
-                df_local_bills_foreign_currency.to_excel(writer, sheet_name=br_code, float_format='%.2f', index=False)
-
-    # combine all branch data horizontally, drop columns duplicated during merge, add a total column
-    df_all = pd.concat([df_dic[br_code] for br_code in br_codes], axis=1)
-    # add blank data columns for excluded branches
-    for br_code in exclude_br:
-        df_all[br_code] = pd.NA
-    # get final dataframe with data cleaned and sorted
-    df_final = df_all.loc[:, ~df_all.columns.duplicated()]
-    key_col = df_final.pop(df_final.columns[0])
-    df_final = df_final[sorted(df_final.columns)]
-    df_final.insert(0, key_col.name, key_col)
-    df_final.insert(len(df_final.columns), 'Main Operation', df_final.sum(axis=1, numeric_only=True))
+    local_bills_outstanding, local_bills_foreign_currency = local_bills
+    df_gl_amounts = pd.DataFrame(gl_amounts, index=br_codes, columns=['ldbp_outstanding', 'local_bills_collection'])
+    ldbp_outstanding = df_gl_amounts['ldbp_outstanding']
+    local_bills_collection = df_gl_amounts['local_bills_collection']
+    # create particulars x branch dataframe with respective data
+    df_matrix = pd.DataFrame(
+        [local_bills_outstanding, ldbp_outstanding, ldbp_outstanding, matured_acceptance, overdue_bills,
+        local_bills_foreign_currency, local_bills_foreign_currency, local_bills_collection],
+        index=particulars, columns=br_codes
+    )
+    # rows of amounts in paisa are stacked as float, kept as paisa
+    if exact:
+        df_matrix = df_matrix.astype(paisa_dtype)
+    # get final dataframe with blank columns for excluded branches, sorted and with a total column
+    df_final = consolidate(df_matrix, exclude_br)
     # export final output result in excel
-    with pd.ExcelWriter(f'iss_export_bill/ISS_Export-Local_{report_period}.xlsx', engine='openpyxl') as writer:
-        df_final.to_excel(writer, float_format='%.2f', index=False)
-        # beautify output
-        sheet = writer.sheets['Sheet1']
-        auto_column_width(sheet, df_final)
-        sheet.column_dimensions['A'].width = 55
-        col_list = [chr(i) for i in range(ord('B'), ord('Z'))]
-        for col in col_list:
-            for cell in sheet[col]:
-                cell.number_format = '#,##0.00'
-
-def main(functions, br_codes, exclude_br=[], selection=1):
-    # create directories if not exist
-    if not os.path.exists('BAL_SHEET'):
-        os.makedirs('BAL_SHEET')
-    if not os.path.exists('RAW_BO'):
-        os.makedirs('RAW_BO')
-    # generate reports for different parts of ISS with threading to show loader and completion
-    loading_message = "Processing: "
+    export_report(df_final, outfile)
+
+# function to get final report dataframe from particulars x branch dataframe
+@staged('aggregation')
+def consolidate(df_matrix, exclude_br=[]):
+    df_final = df_matrix.copy()
+    for br_code in exclude_br: #fillna blank column data for excluded branches
+        df_final[br_code] = pd.NA
+    df_final = df_final[sorted(df_final.columns)] #sort columns branchwise
+    df_final['Main Operation'] = df_final.sum(axis=1, numeric_only=True)
+    df_final.insert(0, 'Particulars', df_final.index)
+    return df_final.reset_index(drop=True)
+
+# function to export final report with amount format and wide particulars column
+def export_report(df_final, outfile):
+    # parquet & csv reports are a single table for loaders of other systems
+    if not outfile.endswith('.xlsx'):
+        with stage(f'{os.path.splitext(outfile)[1][1:]} writing', file=os.path.basename(outfile)):
+            write_table(taka_frame(df_final), outfile)
+        return
+    amount_cols = [col for col in df_final.columns if col != 'Particulars']
+    with OutputFile(outfile) as report:
+        report.add(df_final, 'Sheet1', formats={col: '#,##0.00' for col in amount_cols}, widths={'Particulars': 55})
+
+def main(functions, br_codes, exclude_br=[], options=None, full_run=False, profile=False, cprofile=False, periods=None):
+    options = options or Options()
+    # reports of last month from working directory unless periods to backfill are given
+    if periods is None:
+        periods = [Period.last_month()]
+        # create directories if not exist
+        if not os.path.exists('BAL_SHEET'):
+            os.makedirs('BAL_SHEET')
+        if not os.path.exists('RAW_BO'):
+            os.makedirs('RAW_BO')
+    # remove cached data of deleted or modified input files
+    evict_cache(cache_dir)
+    # time stages of every task and write run report if profiling
+    profiler = Profiler('iss_profile', cprofile) if profile else None
+    if profiler:
+        profiler.start()
+    # add tasks of selected reports of all periods to one task graph, so inputs used by many reports are loaded once,
+    # periods run in parallel, and results of previous run are reused for tasks with unchanged inputs unless a full run is asked
+    store = ResultStore(store_dir)
+    if full_run:
+        store.clear()
+    graph = TaskGraph(options.workers, store, profiler, job_dir=options.job_dir)
+    report_tasks = {iss_import_loan: import_loan_tasks, iss_import_bill: import_bill_tasks, iss_export_bill: export_bill_tasks}
+    report_names = dict(zip(report_tasks, report_options.values()))
+    reports = {}
+    for period in periods:
+        for f in functions:
+            report_name = f'{report_names[f]} {period.name}' if len(periods) > 1 else report_names[f]
+            with stage('file discovery', report=report_name):
+                reports[report_tasks[f](graph, br_codes, exclude_br, period, options)] = report_name
+    # generate reports with threading to show loader with task progress and report completion
+    progress = Progress(graph)
     loading_symbols = [
         '|▷▷▷▷▷▷▷▷|', '/▶▷▷▷▷▷▷▷|', '-▶▶▷▷▷▷▷▷|', '\\▶▶▶▷▷▷▷▷|', '|▶▶▶▶▷▷▷▷|', '/▶▶▶▶▶▷▷▷|', '-▶▶▶▶▶▶▷▷|', '\\▶▶▶▶▶▶▶▷|',
         '|▶▶▶▶▶▶▶▶|', '|▶▶▶▶▶▶▶▷\\', '|▶▶▶▶▶▶▷▷-', '|▶▶▶▶▶▷▷▷/', '|▶▶▶▶▷▷▷▷|', '|▶▶▶▷▷▷▷▷\\', '|▶▶▷▷▷▷▷▷-', '|▶▷▷▷▷▷▷▷/',
     ]
     done = Event()
-    loader = Thread(target=loading, args=[done, loading_message, loading_symbols])
+    loader = Thread(target=loading, args=[done, progress.status, loading_symbols])
     loader.start()
-    with ThreadPoolExecutor(2) as executor:
-        # function to show task completion
-        def tasks_completed(future):
-            global reports, report_generated, progress, selection
-            with Lock():
+    report_generated = 0
+    # function to show task completion, progress is counted for every task and reports are shown when completed
+    def tasks_completed(task):
+        nonlocal report_generated
+        progress.update(task)
+        if task not in reports:
+            return
+        if task.error:
+            print(f"!ERROR! {task.error}")
+            return
+        report_generated += 1
+        percent = (report_generated/len(reports)) * 100
+        print(f"{reports[task]} report {'is up to date' if task.fresh else 'generated'}.")
+        print(f"{report_generated}/{len(reports)} reports completed - {round(percent)}%", flush=True)
+    try:
+        graph.run(tasks_completed)
+    finally:
+        done.set() # loader's ending condition
+        loader.join() # wait for loader to finish
+        if profiler:
+            summary = profiler.write(progress)
+            print(f"Run report saved in {profiler.outdir}/{profiler.name}.json ({summary['seconds']}s, peak {summary['peak_rss_mb']} MB)")
+    # whether all reports are generated
+    return report_generated == len(reports)
+
+# function to run as a service, polling input folders to parse each file once copied completely and keep it in memory,
+# and generating reports affected by new or changed files once all of their inputs are present
+def watch(functions, br_codes, exclude_br=[], options=None, interval=5, max_frames=64):
+    options = options or Options()
+    for folder in ['BAL_SHEET', 'RAW_BO']:
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+    keep_hot(max_frames)
+    landed, last_poll = {}, {}
+    print(f"Watching BAL_SHEET and RAW_BO for input files every {interval}s, press Ctrl+C to stop")
+    try:
+        while True:
+            files = input_files()
+            # a file is complete once its size & modified time are same in two polls, e.g. not being copied anymore
+            new_files = [path for path, stat in files.items() if last_poll.get(path) == stat and landed.get(path) != stat]
+            last_poll = files
+            for path in new_files:
+                landed[path] = files[path]
+                try:
+                    prefetch_input(path, options.work_files, options.exact)
+                except Exception as e: #file is parsed again by its report and error shown there
+                    print(f"!ERROR! {path}: {e}")
+            # reports having any new input, run once all their inputs are present
+            ready = []
+            for f in functions:
+                inputs = report_inputs(f, br_codes)
+                if all(inputs.values()) and any(path in new_files for path in inputs.values()):
+                    ready.append(f)
+            if ready:
+                print(f"{datetime.now():%H:%M:%S} new input files: {', '.join(os.path.basename(path) for path in new_files)}")
                 try:
-                    result = future.result()
-                    selection += 1
-                    report_generated += 1
-                    progress = (report_generated/reports) * 100
-                    print(f"{report_options[selection]} report generated.")
-                    print(f"{report_generated}/{reports} reports completed - {round(progress)}%", flush=True)
-                except Exception as e:
+                    main(ready, br_codes, exclude_br, options)
+                except Exception as e: #keep watching, report is generated again when its files change
                     print(f"!ERROR! {e}")
-        global reports, report_generated, progress
-        futures = []
-        for f in functions:
-            futures.append(executor.submit(f, br_codes, exclude_br))
-        reports = len(futures)
-        report_generated = 0
-        for future in futures:
-            future.add_done_callback(tasks_completed)
-    done.set() # loader's ending condition
-    loader.join() # wait for loader to finish
+            sleep(interval)
+    except KeyboardInterrupt:
+        print("Stopped watching input folders")
 
-if __name__ == '__main__':
+# function to get size & modified time of input files, without temporary files of excel
+def input_files():
+    files = {}
+    for folder in ['BAL_SHEET', 'RAW_BO']:
+        for entry in os.scandir(folder):
+            if entry.is_file() and not entry.name.startswith('~$'):
+                stat = entry.stat()
+                files[os.path.join(folder, entry.name)] = (stat.st_size, stat.st_mtime_ns)
+    return files
+
+# hints of BO file names of each report
+report_hints = {iss_import_loan: ['same month'], iss_import_bill: ['bills'], iss_export_bill: ['603r', 'mautured', 'overdue local']}
+bo_hints = [hint for hints in report_hints.values() for hint in hints]
+
+# function to get input files of a report found the same way as its tasks, None for files not present yet
+def report_inputs(f, br_codes):
+    bo_files, htmls = os.listdir('RAW_BO'), os.listdir('BAL_SHEET')
+    hints = report_hints[f]
+    inputs = {hint: next((os.path.join('RAW_BO', file) for file in bo_files if hint in file.lower()), None) for hint in hints}
+    if f is iss_import_bill:
+        inputs['BALSHEET'] = next((os.path.join('BAL_SHEET', html) for html in htmls if 'BALSHEET' in html and 'BALSHEETBRN' not in html), None)
+        return inputs
+    if f is iss_export_bill:
+        inputs['Ex-Rate'] = os.path.join('RAW_BO', 'Ex-Rate.xlsx') if 'Ex-Rate.xlsx' in bo_files else None
+    return inputs | {br_code: next((os.path.join('BAL_SHEET', html) for html in htmls if 'BALSHEETBRN' in html and br_code in html), None)
+                     for br_code in br_codes}
+
+# function to parse an input file as soon as it is complete, so reports find it parsed in memory
+def prefetch_input(path, work_files=True, exact=False):
+    name = os.path.basename(path)
+    if name.lower().endswith(('.html', '.htm')):
+        load_gl(path, branch_gl_codes() if 'BALSHEETBRN' in name else bill_gl, exact)
+        return
+    hint = next((hint for hint in bo_hints if hint in name.lower()), None)
+    if hint and name.lower().endswith(('.xlsx', '.xlsm', '.csv')):
+        period = Period.last_month()
+        read_bo(path, cache_dir=cache_dir, **bo_args(hint, work_files, exact, period.first_date, period.balance_date))
+
+# reports by name in command line arguments
+report_keys = {'loan': iss_import_loan, 'bill': iss_import_bill, 'export': iss_export_bill}
+
+# function to check a branch code argument
+def branch_code(value):
+    if not (len(value) == 3 and value.isdigit()):
+        raise argparse.ArgumentTypeError(f"invalid branch code '{value}', branch codes have 3 digits")
+    return value
+
+# function to check a month or range of months argument
+def month_range(value):
+    try:
+        months = [datetime.strptime(month, '%Y-%m') for month in value.split(':', 1)]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid month '{value}', use YYYY-MM or YYYY-MM:YYYY-MM")
+    if months[0] > months[-1]:
+        raise argparse.ArgumentTypeError(f"invalid range '{value}', start month is after end month")
+    return value
+
+def positive_int(value):
+    if not value.isdigit() or int(value) < 1:
+        raise argparse.ArgumentTypeError(f"invalid number '{value}', must be 1 or more")
+    return int(value)
+
+def non_negative_int(value):
+    if not value.isdigit():
+        raise argparse.ArgumentTypeError(f"invalid number '{value}', must be 0 or more")
+    return int(value)
+
+# function to check a seconds argument, more than 0 unless zero is allowed
+def seconds(value, zero=False):
+    try:
+        number = float(value)
+    except ValueError:
+        number = None
+    if number is None or number != number or number < 0 or (number == 0 and not zero):
+        raise argparse.ArgumentTypeError(f"invalid seconds '{value}', must be {'0 or more' if zero else 'more than 0'}")
+    return number
+
+def idle_seconds(value):
+    return seconds(value, zero=True)
+
+# function to get command line arguments, only standard modules are used so help & errors are shown at once
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Automatically generate ISS report from html balance sheet and BO files',
+                                     epilog='Questions are asked for branches to exclude & reports to generate unless given as '
+                                            'arguments or the app runs without a console, e.g. as a scheduled task.')
+    parser.add_argument('--branches', nargs='+', type=branch_code, default=bank_br_codes, metavar='CODE',
+                        help='branch codes to generate reports of, all branches of the bank by default')
+    parser.add_argument('--exclude', nargs='+', type=branch_code, metavar='CODE', help='branch codes to exclude')
+    parser.add_argument('--reports', nargs='+', choices=list(report_keys), help='reports to generate, all by default')
+    parser.add_argument('--input-dir', help='directory with BAL_SHEET & RAW_BO of last month, working directory by default')
+    parser.add_argument('--output-dir', help='directory to write reports of last month in, input directory by default')
+    parser.add_argument('--workers', type=positive_int, default=1, help='number of processes for branchwise calculation')
+    parser.add_argument('--no-work-files', dest='work_files', action='store_false', help='skip writing work files')
+    parser.add_argument('--report-format', choices=output_formats, default='xlsx', help='file format of final reports')
+    parser.add_argument('--work-format', choices=output_formats + ['none'], default='xlsx',
+                        help='file format of work files, parquet & csv work files are directories with a file for each sheet')
+    parser.add_argument('--exact-amounts', dest='exact', action='store_true',
+                        help='keep amounts in whole paisa so totals are exact, and require BO & GL bill amounts to match exactly')
+    parser.add_argument('--chunk-size', type=non_negative_int, default=0,
+                        help='read large BO reports in chunks of given rows with constant memory, without their work files')
+    parser.add_argument('--full-run', action='store_true', help='generate all reports again, ignoring results of previous run')
+    parser.add_argument('--profile', action='store_true', help='time each stage with peak memory and save run report in iss_profile')
+    parser.add_argument('--cprofile', action='store_true', help='with --profile, also save cProfile stats of all tasks')
+    parser.add_argument('--periods', nargs='+', type=month_range, metavar='YYYY-MM[:YYYY-MM]',
+                        help='generate all reports of given months or ranges of months without questions, inputs of each month '
+                             'read from its YYYY-MM directory with BAL_SHEET & RAW_BO')
+    parser.add_argument('--input-root', default='.', help='directory with input directories of months to backfill')
+    parser.add_argument('--output-root', help='directory to write reports of backfilled months, else in their input directories')
+    parser.add_argument('--job-dir', help='directory on a shared filesystem to give branchwise parsing & work files as jobs to '
+                                           'workers of any machine, with --workers local workers')
+    parser.add_argument('--worker', action='store_true',
+                        help='run jobs of --job-dir until stopped, started in the same directory as the app giving jobs')
+    parser.add_argument('--max-idle', type=idle_seconds, help='seconds without jobs after which a worker stops')
+    parser.add_argument('--watch', action='store_true',
+                        help='keep running, generating reports again as soon as all their input files are copied')
+    parser.add_argument('--watch-interval', type=seconds, default=5, help='seconds between checks of input folders in watch mode')
+    parser.add_argument('--hot-frames', type=positive_int, default=64, help='parsed input files kept in memory in watch mode')
+    args = parser.parse_args(argv)
+    if args.worker and not args.job_dir:
+        parser.error("--worker needs --job-dir")
+    if args.watch and args.job_dir:
+        parser.error("--watch keeps parsed input files in memory of this process, without --job-dir")
+    if args.watch and (args.periods or args.input_dir or args.output_dir):
+        parser.error("--watch reads BAL_SHEET & RAW_BO of working directory, without --periods, --input-dir or --output-dir")
+    if args.periods and (args.input_dir or args.output_dir):
+        parser.error("use --input-root & --output-root with --periods")
+    return args
+
+# function to run the app from command line arguments, asking questions not answered by arguments if run from a console;
+# returns exit status, 1 if any report failed so scheduled runs can detect it
+def cli(argv=None):
+    args = parse_args(argv)
+    functions = [report_keys[key] for key in args.reports] if args.reports else list(report_keys.values())
+    exclude_br = args.exclude or []
+    br_codes = [br_code for br_code in args.branches if br_code not in exclude_br]
+    # backfill of past months runs without questions for all branches & reports
+    periods = backfill_periods(args.periods, args.input_root, args.output_root) if args.periods else None
+    if args.input_dir or args.output_dir:
+        periods = [Period.last_month(args.input_dir or '.', args.output_dir)]
+    ask = not args.periods and not args.worker and sys.stdin is not None and sys.stdin.isatty()
     # give users option to exclude any branches
-    br_codes=['001', '091', '101', '102', '103', '104', '105', '106', '110', '116', '195', '200', '301', '331', '999']
-    exclude_br = []
-    if user_input("Do you want to exclude any branch?"):
+    if ask and args.exclude is None and user_input("Do you want to exclude any branch?"):
         input_list = input("Branch codes seperated with comma: ").replace(" ", "")
         exclude_br = input_list.split(',')
         br_codes = [br_code for br_code in br_codes if br_code not in exclude_br]
     # give users option to select report catagory
-    functions =[iss_import_loan, iss_import_bill, iss_export_bill]
-    selection = 0
-    if user_input("Do you want to generate only a part of the report?"):
+    if ask and args.reports is None and user_input("Do you want to generate only a part of the report?"):
         for key, value in report_options.items():
             print(f"{key}){value}", end="  ")
-        selection = int(input("\nChoose a report catagory: ")) - 1
-        functions = [f for i, f in enumerate(functions) if i == selection]
+        choice = int(input("\nChoose a report catagory: ")) - 1
+        functions = [f for i, f in enumerate(report_keys.values()) if i == choice]
+    options = Options(args.workers, args.work_files, args.chunk_size, args.report_format, args.work_format, args.exact,
+                      args.job_dir)
     # set expiry date for trial run of the app
     expiry_date = datetime.strptime('2023-12-31', '%Y-%m-%d')
+    status = 0
     if datetime.today() < expiry_date:
-        # run main function
-        main(functions, br_codes, exclude_br, selection)
+        # run main function, or run jobs of other app, or keep generating reports as input files arrive
+        if args.worker:
+            print(f"Running jobs of {args.job_dir}, press Ctrl+C to stop")
+            try:
+                work(args.job_dir, max_idle=args.max_idle)
+            except KeyboardInterrupt:
+                print("Stopped running jobs")
+        elif args.watch:
+            watch(functions, br_codes, exclude_br, options, args.watch_interval, args.hot_frames)
+        else:
+            generated = main(functions, br_codes, exclude_br, options, args.full_run, args.profile, args.cprofile, periods)
+            status = 0 if generated else 1
     else:
         # show expried message
         print(f"!TRIAL PERIOD EXPIRED! Please contact developer for renewal. @phenomroman")
-    sleep(2)
\ No newline at end of file
+        status = 1
+    # keep console window open for a moment to read the result
+    if ask:
+        sleep(2)
+    return status
+
+if __name__ == '__main__':
+    freeze_support() #required for worker processes of packaged exe
+    sys.exit(cli())
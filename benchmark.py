@@ -0,0 +1,254 @@
+#! /usr/bin/env python3
+# -------------------------------------------------------------------------------
+# Name:        benchmark
+# Purpose:     Time and memory-profile ISS reports and feats functions on generated data of any size
+#
+# Author:      phenomroman
+#
+# Created:     17-10-2026
+# Copyright:   (c) phenomroman 2026
+# Licence:     BSD
+#-------------------------------------------------------------------------------
+from datetime import datetime
+import subprocess
+import argparse
+import platform
+import tempfile
+import shutil
+import json
+import sys
+import os
+
+# directory of this file, benchmarks run with their own working directory
+root_dir = os.path.dirname(os.path.abspath(__file__))
+benchmark_dir = os.path.join(root_dir, 'benchmarks')
+# branches & BO rows of the full benchmark
+full_branches = [15, 100, 500]
+full_rows = [10_000, 100_000, 500_000, 2_000_000]
+# slower than last results by more than this ratio is shown as regression, unless only by timer noise of small cases
+regression_ratio = 0.1
+noise_seconds = 0.05
+
+# function to time a report end to end on given branches, with a fresh cache directory of the working directory
+def report_case(name):
+    def case(br_codes, workers, chunk_size):
+        import auto_iss
+        report = getattr(auto_iss, name)
+        return lambda: report(br_codes, [], options=auto_iss.Options(workers, chunk_size=chunk_size))
+    return case
+
+# function to time parsing balance sheets of all branches with only GLs required by reports
+def read_balance_sheet_case(br_codes, workers, chunk_size):
+    from feats import read_balance_sheet
+    from auto_iss import branch_gl_codes
+    urls, gl_codes = [f'BAL_SHEET/BALSHEETBRN_{br_code}.html' for br_code in br_codes], branch_gl_codes()
+    cols = ['Level', 'Leaf', 'GL Code', 'GL Description', 'FCY Balance', 'LCY Balance', 'Total']
+    return lambda: [read_balance_sheet(url, slice(1,-1), cols, ['Leaf', 'GL Description'], gl_codes) for url in urls]
+
+# function to time parsing balance sheets of all branches with pd.read_html
+def html_to_xl_case(br_codes, workers, chunk_size):
+    from feats import html_to_xl
+    urls = [f'BAL_SHEET/BALSHEETBRN_{br_code}.html' for br_code in br_codes]
+    cols = ['Level', 'Leaf', 'GL Code', 'GL Description', 'FCY Balance', 'LCY Balance', 'Total']
+    return lambda: [html_to_xl(url, slice(1,-1), cols, ['Leaf', 'GL Description']) for url in urls]
+
+# arguments to read 508 bills BO like import bill report
+def bill_args():
+    url = [f'RAW_BO/{file}' for file in os.listdir('RAW_BO') if 'bills' in file.lower()][0]
+    return url, {'row_ignore': ['IB02', 'IB06', 'IB13', 'IB52', 'IB56', 'IB63', 'IB66'],
+                 'usecols': ['Cont. Ref  No.', 'Contract No.', 'LCY Balance'],
+                 'dtype': {'Cont. Ref  No.': str, 'Contract No.': str, 'LCY Balance': 'float64'}}
+
+def modify_raw_case(br_codes, workers, chunk_size):
+    from feats import modify_raw
+    url, kwargs = bill_args()
+    return lambda: modify_raw(url, None, 'Cont. Ref  No.', **kwargs)
+
+def modify_raw_chunks_case(br_codes, workers, chunk_size):
+    from feats import modify_raw_chunks
+    url, kwargs = bill_args()
+    return lambda: sum(len(df) for df in modify_raw_chunks(url, 'Cont. Ref  No.', chunk_size or 100_000, **kwargs))
+
+# function to time summing bills of LC code catagories by branch, on bills read before timing
+def branch_pivot_case(br_codes, workers, chunk_size):
+    from feats import modify_raw, branch_pivot
+    from auto_iss import bill_codes
+    url, kwargs = bill_args()
+    df = bill_codes(modify_raw(url, None, 'Cont. Ref  No.', **kwargs))
+    lc_codes = {lc_code: lc_code for lc_code in sorted(df['LC Code'].unique())}
+    return lambda: branch_pivot(df, 'Br. Code', 'LCY Balance', br_codes, 'LC Code', lc_codes)
+
+# function to time writing bills read before timing as a formatted work file
+def output_file_case(br_codes, workers, chunk_size):
+    from feats import modify_raw, OutputFile
+    url, kwargs = bill_args()
+    kwargs['usecols'] = None
+    df = modify_raw(url, None, 'Cont. Ref  No.', **kwargs)
+    def write():
+        with OutputFile('bills.xlsx') as work_file:
+            work_file.add(df, 'Report1', formats={'LCY Balance': '#,##0.00'})
+    return write
+
+# function to time starting the app until its command line help is shown, e.g. before any report module is loaded
+def startup_case(br_codes, workers, chunk_size):
+    command = [sys.executable, os.path.join(root_dir, 'auto_iss.py'), '--help']
+    return lambda: subprocess.run(command, capture_output=True, check=True)
+
+cases = {
+    'startup': startup_case,
+    'iss_import_loan': report_case('iss_import_loan'),
+    'iss_import_bill': report_case('iss_import_bill'),
+    'iss_export_bill': report_case('iss_export_bill'),
+    'read_balance_sheet': read_balance_sheet_case,
+    'html_to_xl': html_to_xl_case,
+    'modify_raw': modify_raw_case,
+    'modify_raw_chunks': modify_raw_chunks_case,
+    'branch_pivot': branch_pivot_case,
+    'OutputFile': output_file_case,
+}
+
+# function to get generated input files of given size, generated once and kept for later runs
+def fixture(branches, rows, gl_size, seed):
+    from synth_data import generate, synth_br_codes
+    path = os.path.join(benchmark_dir, 'fixtures', f'br{branches}_rows{rows}_gl{gl_size}_seed{seed}')
+    if not os.path.exists(os.path.join(path, 'done')):
+        print(f"Generating {branches} branches with {rows} BO rows...", flush=True)
+        shutil.rmtree(path, ignore_errors=True)
+        generate(path, branches, rows, gl_size, seed)
+        open(os.path.join(path, 'done'), 'w').close()
+    return path, synth_br_codes(branches)
+
+# function to run one case in this process from a new working directory with the fixture inputs, returns seconds &
+# peak memory in MB of the timed part only
+def measure(name, fixture_dir, br_codes, workers=1, chunk_size=0):
+    from feats import stage, stage_local
+    workdir = tempfile.mkdtemp(prefix='iss_benchmark_')
+    try:
+        for folder in ['BAL_SHEET', 'RAW_BO']:
+            try:
+                os.symlink(os.path.join(fixture_dir, folder), os.path.join(workdir, folder), target_is_directory=True)
+            except OSError: #symlinks not allowed, e.g. windows without developer mode
+                shutil.copytree(os.path.join(fixture_dir, folder), os.path.join(workdir, folder))
+        os.chdir(workdir)
+        func = cases[name](br_codes, workers, chunk_size)
+        stage_local.records, stage_local.tags = [], {}
+        with stage(name):
+            func()
+        record = stage_local.records[-1]
+        return {'seconds': record['seconds'], 'peak_rss_mb': record['peak_rss_mb'], 'rss_start_mb': record['rss_start_mb']}
+    finally:
+        os.chdir(root_dir)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+# function to run a case in a new process, so memory & caches of one case do not count in another
+def run_case(name, fixture_dir, branches, workers, chunk_size):
+    command = [sys.executable, os.path.abspath(__file__), '--case', name, '--fixture', fixture_dir,
+               '--branches', str(branches), '--workers', str(workers), '--chunk-size', str(chunk_size)]
+    process = subprocess.run(command, capture_output=True, text=True)
+    if process.returncode:
+        return {'error': process.stderr.strip().splitlines()[-1] if process.stderr.strip() else f'exit {process.returncode}'}
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+# function to get version of code being measured from git, if any
+def code_version():
+    try:
+        return subprocess.run(['git', 'describe', '--always', '--dirty'], cwd=root_dir, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+# function to run all selected cases on all sizes, best time & worst memory of repeated runs
+def run_benchmark(names, branch_counts, row_counts, gl_size=300, seed=1, workers=1, chunk_size=0, repeat=3):
+    results = []
+    for branches in branch_counts:
+        for rows in row_counts:
+            fixture_dir, _ = fixture(branches, rows, gl_size, seed)
+            for name in names:
+                runs = [run_case(name, fixture_dir, branches, workers, chunk_size) for _ in range(repeat)]
+                errors = [run['error'] for run in runs if 'error' in run]
+                runs = [run for run in runs if 'error' not in run]
+                result = {'case': name, 'branches': branches, 'rows': rows, 'gl_size': gl_size, 'workers': workers,
+                          'chunk_size': chunk_size, 'runs': len(runs),
+                          'seconds': min(run['seconds'] for run in runs) if runs else None,
+                          'peak_rss_mb': max(run['peak_rss_mb'] for run in runs) if runs else None,
+                          'error': errors[0] if errors else None}
+                print(f"{name:<20}{branches:>6} branches{rows:>10} rows   "
+                      + (f"{result['seconds']:>9.3f}s {result['peak_rss_mb']:>9} MB" if runs else f"!ERROR! {result['error']}"),
+                      flush=True)
+                results.append(result)
+    return results
+
+# function to save results of a run with the code version and environment, so later versions can be compared
+def save_results(results):
+    import pandas as pd
+    from feats import module_exists
+    calamine = module_exists('python_calamine')
+    run = {'version': code_version(), 'time': datetime.now().isoformat(timespec='seconds'),
+           'python': platform.python_version(), 'pandas': pd.__version__, 'calamine': calamine,
+           'platform': platform.platform(), 'cpus': os.cpu_count(), 'results': results}
+    os.makedirs(os.path.join(benchmark_dir, 'results'), exist_ok=True)
+    path = os.path.join(benchmark_dir, 'results', f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{run['version']}.json")
+    with open(path, 'w') as file:
+        json.dump(run, file, indent=2)
+    return path
+
+# function to compare results with the latest saved run of another version, shows cases slower or larger than before
+def compare_results(results, previous_file):
+    with open(previous_file) as file:
+        previous = json.load(file)
+    keys = ['case', 'branches', 'rows', 'gl_size', 'workers', 'chunk_size']
+    before = {tuple(result[key] for key in keys): result for result in previous['results']}
+    print(f"\nCompared with {previous['version']} of {previous['time']}:")
+    regressions = 0
+    for result in results:
+        old = before.get(tuple(result[key] for key in keys))
+        if not old or not old['seconds'] or not result['seconds']:
+            continue
+        time_ratio = result['seconds'] / old['seconds']
+        memory_ratio = result['peak_rss_mb'] / old['peak_rss_mb'] if old['peak_rss_mb'] and result['peak_rss_mb'] else 1
+        slower = time_ratio > 1 + regression_ratio and result['seconds'] - old['seconds'] > noise_seconds
+        regression = slower or memory_ratio > 1 + regression_ratio
+        regressions += regression
+        print(f"{result['case']:<20}{result['branches']:>6} branches{result['rows']:>10} rows   "
+              f"time x{time_ratio:.2f}  memory x{memory_ratio:.2f}{'  !REGRESSION!' if regression else ''}")
+    return regressions
+
+def last_results_file(exclude=None):
+    folder = os.path.join(benchmark_dir, 'results')
+    files = sorted(file for file in os.listdir(folder) if file.endswith('.json')) if os.path.exists(folder) else []
+    files = [os.path.join(folder, file) for file in files if os.path.join(folder, file) != exclude]
+    return files[-1] if files else None
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='benchmark ISS reports and feats functions on generated data')
+    parser.add_argument('cases', nargs='*', default=list(cases), help=f"cases to run, from {', '.join(cases)}")
+    parser.add_argument('--branches', type=int, nargs='+', default=[15], help='branch counts to run on')
+    parser.add_argument('--rows', type=int, nargs='+', default=[10_000], help='BO row counts to run on')
+    parser.add_argument('--full', action='store_true', help=f'run on {full_branches} branches x {full_rows} BO rows')
+    parser.add_argument('--gl-size', type=int, default=300, help='GLs in balance sheet of each branch')
+    parser.add_argument('--seed', type=int, default=1, help='seed of generated data')
+    parser.add_argument('--workers', type=int, default=1, help='worker processes of reports')
+    parser.add_argument('--chunk-size', type=int, default=0, help='read BO reports in chunks of given rows')
+    parser.add_argument('--repeat', type=int, default=3, help='runs of each case, best time is kept')
+    parser.add_argument('--compare', metavar='RESULTS_FILE', nargs='?', const='last',
+                        help='compare with given results file or last saved results')
+    parser.add_argument('--case', help=argparse.SUPPRESS)
+    parser.add_argument('--fixture', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.case: #single case run by run_case in its own process
+        from synth_data import synth_br_codes
+        print(json.dumps(measure(args.case, args.fixture, synth_br_codes(args.branches[0]), args.workers, args.chunk_size)))
+        sys.exit()
+    unknown = [name for name in args.cases if name not in cases]
+    if unknown:
+        parser.error(f"unknown cases {unknown}")
+    branch_counts, row_counts = (full_branches, full_rows) if args.full else (args.branches, args.rows)
+    results = run_benchmark(args.cases, branch_counts, row_counts, args.gl_size, args.seed, args.workers, args.chunk_size, args.repeat)
+    path = save_results(results)
+    print(f"Results saved in {os.path.relpath(path)}")
+    if args.compare:
+        previous_file = last_results_file(exclude=path) if args.compare == 'last' else args.compare
+        if previous_file:
+            compare_results(results, previous_file)
+        else:
+            print("No previous results to compare with")
@@ -9,14 +9,50 @@
 # Copyright:   (c) phenomroman 2023
 # Licence:     BSD
 # -------------------------------------------------------------------------------
-from time import sleep
-import pandas as pd
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from datetime import date, datetime
+from functools import cache, wraps
+from threading import BoundedSemaphore, Event, Lock, Thread, get_ident, local
+from time import perf_counter, sleep, time
+import csv
+import hashlib
+import importlib.util
+import json
+import multiprocessing
+import operator
+import os
+import pickle
+import re
+import socket
+import sys
 
-# function to show loading animation
+# function to import a module when its attributes are first used, so apps start and show questions before heavy
+# modules like pandas are loaded
+def lazy_import(name):
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+# function to finish loading a lazily imported module, as loading it first from several threads at once is not thread
+# safe before Python 3.12
+def load_module(module):
+    return module.__spec__
+
+pd = lazy_import('pandas')
+
+# function to show loading animation, message can be a function giving current status
 def loading(done, message="Loading: ", symbols=['\\', '|', '/', '-']):
     i = 0
     while not done.is_set():
-        print(message, end="")
+        print(message() if callable(message) else message, end="")
         print(f"{symbols[i]}", flush=True, end="\r")
         sleep(0.25)
         i = (i + 1) % len(symbols)
@@ -38,16 +74,243 @@ def user_input(question):
         print("Please enter a valid answer between Y and N")
         return user_input(question)
     
-def auto_column_width(sheet, dataframe, ignore_list=[]):
-    for column in dataframe.columns:
-        # get desired column width
-        column_length = max(dataframe[column].astype(str).map(len).max(), len(column))
-        adjusted_width = (column_length + 2) * 1.11
-        # modify width of column A through Z besides ignore list
-        for col in [chr(i) for i in range(ord('A'), ord('Z')) if chr(i) not in ignore_list]:
-            sheet.column_dimensions[col].width = adjusted_width
-
-def html_to_xl(url, table_range, cols, ignore_list=[], outfile=None):
+# stage records of each thread, kept only while profiling
+stage_local = local()
+# stages running in this process with their peak memory, updated by a sampling thread
+active_stages = {}
+active_lock = Lock()
+rss_sampler = None
+
+# context manager to time a stage and sample its peak memory, tagged with task of the thread and given tags
+@contextmanager
+def stage(name, **tags):
+    records = getattr(stage_local, 'records', None)
+    if records is None:
+        yield
+        return
+    start_sampler()
+    rss = current_rss()
+    record = {'stage': name} | getattr(stage_local, 'tags', {}) | tags | {
+        'pid': os.getpid(), 'thread': get_ident(), 'start': time(), 'seconds': None,
+        'rss_start_mb': rss, 'rss_end_mb': None, 'peak_rss_mb': rss}
+    started = perf_counter()
+    with active_lock:
+        active_stages[id(record)] = record
+    try:
+        yield
+    finally:
+        rss = current_rss()
+        with active_lock:
+            del active_stages[id(record)]
+            record['seconds'] = round(perf_counter() - started, 6)
+            record['rss_end_mb'] = rss
+            record['peak_rss_mb'] = max_rss(record['peak_rss_mb'], rss)
+        records.append(record)
+
+# decorator to time every call of a function as a stage
+def staged(name):
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+# characters of task names not allowed in file names
+unsafe_chars = re.compile(r'[^\w.-]')
+
+# function to run a task with stage records of its thread if profiling, returns result with records for the profiler and
+# output files still being written in background
+def run_task(name, tags, func, args, cprofile_dir=None, profile=False):
+    stage_local.records, stage_local.tags = ([] if profile else None), {'task': name} | tags
+    writes_local.writes = []
+    if cprofile_dir:
+        import cProfile
+        profile = cProfile.Profile()
+        profile.enable()
+    try:
+        with stage('task'):
+            result = func(*args)
+    finally:
+        if cprofile_dir:
+            profile.disable()
+            # task names may have path separators & colons, not allowed in file names
+            prof_name = unsafe_chars.sub('_', name)
+            try:
+                profile.dump_stats(os.path.join(cprofile_dir, f'{prof_name}.{os.getpid()}.{get_ident()}.prof'))
+            except Exception as e: #profiling never fails the task
+                print(f"!WARNING! cProfile stats of task {name} not saved: {e}")
+        records, stage_local.records, stage_local.tags = stage_local.records, None, {}
+        writes, writes_local.writes = writes_local.writes, None
+    return result, records, writes
+
+# function to get resident memory of this process in MB, None if not available
+def current_rss():
+    try:
+        return round(rss_bytes() / 2**20, 1)
+    except (OSError, ValueError, AttributeError):
+        return None
+
+# function to get resident memory in bytes from /proc
+def proc_rss():
+    with open('/proc/self/statm') as file:
+        return int(file.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+# function to get function giving working set of this process in bytes on windows, where /proc is not available
+def windows_rss():
+    import ctypes
+    from ctypes import wintypes
+    class ProcessMemoryCounters(ctypes.Structure):
+        _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD)] + [
+            (name, ctypes.c_size_t) for name in ['PeakWorkingSetSize', 'WorkingSetSize', 'QuotaPeakPagedPoolUsage',
+                                                 'QuotaPagedPoolUsage', 'QuotaPeakNonPagedPoolUsage',
+                                                 'QuotaNonPagedPoolUsage', 'PagefileUsage', 'PeakPagefileUsage']]
+    get_process = ctypes.windll.kernel32.GetCurrentProcess
+    get_process.restype = wintypes.HANDLE
+    get_memory_info = ctypes.windll.psapi.GetProcessMemoryInfo
+    get_memory_info.argtypes = [wintypes.HANDLE, ctypes.POINTER(ProcessMemoryCounters), wintypes.DWORD]
+    get_memory_info.restype = wintypes.BOOL
+    def rss():
+        counters = ProcessMemoryCounters()
+        counters.cb = ctypes.sizeof(counters)
+        if not get_memory_info(get_process(), ctypes.byref(counters), counters.cb):
+            raise OSError("GetProcessMemoryInfo failed")
+        return counters.WorkingSetSize
+    return rss
+
+# function to get function giving resident memory in bytes with psutil if installed, else from windows api or /proc;
+# found once as memory is sampled every 50ms
+def rss_function():
+    if module_exists('psutil'):
+        import psutil
+        return lambda: psutil.Process().memory_info().rss
+    if sys.platform == 'win32':
+        try:
+            return windows_rss()
+        except (OSError, AttributeError):
+            pass
+    return proc_rss
+
+def max_rss(*values):
+    values = [value for value in values if value is not None]
+    return max(values) if values else None
+
+# function to start the thread sampling memory of running stages, once per process
+def start_sampler():
+    global rss_sampler
+    with active_lock:
+        if rss_sampler:
+            return
+        rss_sampler = Thread(target=sample_rss, daemon=True)
+    rss_sampler.start()
+
+# forked worker processes start with a lock of their own and no sampling thread, since the lock may be held at fork
+def reset_sampler():
+    global active_stages, active_lock, rss_sampler
+    active_stages, active_lock, rss_sampler = {}, Lock(), None
+
+if hasattr(os, 'register_at_fork'): #not on windows
+    os.register_at_fork(after_in_child=reset_sampler)
+
+def sample_rss(interval=0.05):
+    while True:
+        rss = current_rss()
+        with active_lock:
+            for record in active_stages.values():
+                record['peak_rss_mb'] = max_rss(record['peak_rss_mb'], rss)
+        sleep(interval)
+
+# class to collect stage records of a run and write them as json & csv run report, with optional cProfile dump
+class Profiler:
+    def __init__(self, outdir, cprofile=False):
+        self.outdir = outdir
+        self.name = f"run_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        self.cprofile_dir = os.path.abspath(os.path.join(outdir, f'{self.name}_cprofile')) if cprofile else None
+        self.records = []
+        self.lock = Lock()
+
+    # start recording stages of calling thread, e.g. file discovery of main thread
+    def start(self):
+        os.makedirs(self.cprofile_dir or self.outdir, exist_ok=True)
+        self.started = time()
+        stage_local.records, stage_local.tags = [], {'task': 'main'}
+
+    def add(self, records):
+        with self.lock:
+            self.records += records
+
+    # function to write run report with all stage records and totals by stage, report and branch
+    def write(self, progress=None):
+        self.add(stage_local.records or [])
+        stage_local.records = None
+        df = pd.DataFrame(self.records, columns=list(dict.fromkeys(
+            ['stage', 'task', 'report', 'branch', 'file', 'pid', 'thread', 'start', 'seconds', 'rss_start_mb', 'rss_end_mb', 'peak_rss_mb']
+            + [col for record in self.records for col in record])))
+        df['start'] = df['start'] - self.started
+        df.to_csv(os.path.join(self.outdir, f'{self.name}.csv'), index=False)
+        # stages are totalled by name, reports & branches by their whole tasks
+        def totals(df, col):
+            df_sum = df.groupby(col).agg(count=('seconds', 'size'), seconds=('seconds', 'sum'), peak_rss_mb=('peak_rss_mb', 'max'))
+            return df_sum.reset_index().astype(object).where(df_sum.reset_index().notna(), None).to_dict('records')
+        df_tasks = df.loc[df['stage'] == 'task']
+        summary = {
+            'run': self.name, 'seconds': round(time() - self.started, 3), 'peak_rss_mb': max_rss(*df['peak_rss_mb'].tolist()),
+            'by_stage': totals(df, 'stage'), 'by_report': totals(df_tasks, 'report'), 'by_branch': totals(df_tasks, 'branch'),
+            'stages': df.astype(object).where(df.notna(), None).to_dict('records'),
+        }
+        summary['progress'] = progress.events if progress else []
+        write_json(os.path.join(self.outdir, f'{self.name}.json'), summary)
+        if self.cprofile_dir:
+            import pstats
+            files = [os.path.join(self.cprofile_dir, file) for file in os.listdir(self.cprofile_dir)]
+            if files:
+                pstats.Stats(*files).dump_stats(os.path.join(self.outdir, f'{self.name}.prof'))
+        return summary
+
+# class to count finished tasks of a run from any thread, with events for each task and estimated time left
+class Progress:
+    def __init__(self, graph):
+        self.graph = graph
+        self.total = None
+        self.finished = 0
+        self.started = time()
+        self.events = []
+        self.lock = Lock()
+
+    def update(self, task):
+        with self.lock:
+            # tasks to run are known once graph has found unchanged tasks
+            if self.total is None:
+                self.total = len([task for task in self.graph.tasks.values() if not task.fresh])
+            if task.fresh:
+                status = 'up to date'
+            else:
+                self.finished += 1
+                status = 'failed' if task.error else 'done'
+            event = {'time': round(time() - self.started, 3), 'task': task.name, 'status': status,
+                     'finished': self.finished, 'total': self.total, 'eta': self.eta()} | task.tags
+            self.events.append(event)
+        return event
+
+    # estimated seconds left from average time of finished tasks
+    def eta(self):
+        if not self.finished:
+            return None
+        return round((time() - self.started) / self.finished * (self.total - self.finished), 1)
+
+    def status(self):
+        with self.lock:
+            if self.total is None:
+                return "Processing: "
+            eta = self.eta()
+            return f"Processing {self.finished}/{self.total} tasks, ETA {'--' if eta is None else f'{eta}s'}: "
+
+def html_to_xl(url, table_range, cols, ignore_list=[], outfile=None, cache_dir=None, paisa_cols=[]):
+    # load already parsed dataframe from disk cache when the html file is unchanged
+    if cache_dir and not outfile:
+        return cached_frame(url, html_to_xl, cache_dir, table_range=table_range, cols=cols, ignore_list=ignore_list,
+                            paisa_cols=paisa_cols)
     # read html file tables and concatenate required tables into one dataframe
     tables = pd.read_html(url)
     df = pd.concat(tables[table_range], ignore_index=True)
@@ -55,26 +318,1169 @@ def html_to_xl(url, table_range, cols, ignore_list=[], outfile=None):
     df.columns = cols
     # convert required columns into numeric value
     for name in [col for col in cols if col not in ignore_list]:
-        df[name] = pd.to_numeric(df[name], errors='coerce')
+        df[name] = parse_paisa(df[name]) if name in paisa_cols else pd.to_numeric(df[name], errors='coerce')
     df = df.dropna() #remove blank rows
     if outfile: #output to excel file
-        df.to_excel(outfile, index=False, float_format='%.2f')
+        taka_frame(df).to_excel(outfile, index=False, float_format='%.2f')
     else: #return dataframe for further calculation
         return df
 
-def modify_raw(bo_raw, bo_file, key_id, sheet_name='Report1', row_index=3, col_required=True, code=slice(3,7), row_ignore=[]):
-    # set header with proper row & delete blank rows for key_id
-    df = pd.read_excel(bo_raw, sheet_name=sheet_name, header=row_index-1).dropna(subset=[key_id])
+# cell values treated as blank by pd.read_html and whitespace replaced the same way
+na_values = {'', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+             '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'}
+whitespace = re.compile(r'[\r\n]+|\s{2,}')
+
+# function to stream balance sheet html rows with lxml, same result as html_to_xl but keeping only given GL codes
+def read_balance_sheet(url, table_range, cols, ignore_list=[], gl_codes=None, gl_col='GL Code', cache_dir=None, paisa_cols=[]):
+    # load already parsed dataframe from disk cache when the html file is unchanged
+    if cache_dir:
+        return cached_frame(url, read_balance_sheet, cache_dir, table_range=table_range, cols=cols,
+                            ignore_list=ignore_list, gl_codes=sorted(gl_codes) if gl_codes else None, gl_col=gl_col,
+                            paisa_cols=paisa_cols)
+    from lxml import etree
+    if (table_range.start or 0) < 0 or table_range.step not in (None, 1):
+        raise ValueError("table_range must start from a positive table number without step")
+    codes = set(gl_codes) if gl_codes else None
+    gl_index = cols.index(gl_col)
+    # tables from negative end of the range are known only after later tables are found, so keep them pending
+    lag = -table_range.stop if table_range.stop is not None and table_range.stop < 0 else 0
+    pending = deque()
+    rows, index = [], []
+    row_no, table_no = 0, -1
+    for event, elem in etree.iterparse(url, events=('start', 'end'), html=True, huge_tree=True):
+        tag = elem.tag
+        if event == 'start':
+            if tag == 'table':
+                table_no += 1
+                table = {'no': table_no, 'rows': [], 'index': [], 'count': 0, 'header': True}
+                head = False
+            elif tag == 'thead':
+                head = True
+            elif tag == 'tr':
+                cells, th_only = [], True
+            continue
+        if tag in ('td', 'th'):
+            text = whitespace.sub(' ', ''.join(elem.itertext()).strip())
+            cells.extend([text] * int(elem.get('colspan', 1)))
+            th_only = th_only and tag == 'th'
+        elif tag == 'thead':
+            head = False
+        elif tag == 'tr':
+            # leading rows with only th cells or rows of thead are table headers like pd.read_html
+            table['header'] = table['header'] and th_only
+            if cells and not head and not table['header']:
+                values = [None if text in na_values else text for text in (cells + [None] * len(cols))[:len(cols)]]
+                if codes is None or gl_number(values[gl_index]) in codes:
+                    table['rows'].append(values)
+                    table['index'].append(table['count'])
+                table['count'] += 1
+            # free parsed rows to keep memory flat for large files
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+        elif tag == 'table':
+            pending.append(table)
+            while len(pending) > lag:
+                table = pending.popleft()
+                if table['no'] >= (table_range.start or 0) and (table_range.stop is None or lag or table['no'] < table_range.stop):
+                    rows.extend(table['rows'])
+                    index.extend([row_no + i for i in table['index']])
+                    row_no += table['count']
+    df = pd.DataFrame(rows, columns=cols, index=index)
+    # convert required columns into numeric value
+    for name in [col for col in cols if col not in ignore_list]:
+        if name in paisa_cols:
+            df[name] = parse_paisa(df[name])
+        else:
+            df[name] = pd.to_numeric(df[name].str.replace(',', '', regex=False), errors='coerce')
+    return df.dropna() #remove blank rows
+
+def gl_number(text):
+    try:
+        return float(text.replace(',', ''))
+    except (AttributeError, ValueError):
+        return None
+
+@staged('modify_raw')
+def modify_raw(bo_raw, work_file, key_id, sheet_name='Report1', row_index=3, col_required=True, code=slice(3,7), row_ignore=[],
+               usecols=None, dtype=None, filters=[], cache_dir=None):
+    # set header with proper row & delete blank rows for key_id, reading only required columns & rows if given
+    df = read_bo(bo_raw, key_id, sheet_name=sheet_name, row_index=row_index, usecols=usecols, dtype=dtype, filters=filters,
+                 code=code if col_required else None, row_ignore=row_ignore if col_required else [], cache_dir=cache_dir)
+    df = clean_raw(df, key_id, col_required, code, row_ignore)
+    # exclude columns with blank data
+    df.dropna(axis=1, how='all', inplace=True)
+    # add cleaned data to work file if given
+    if work_file:
+        work_file.add(df, sheet_name)
+    return df
+
+# function to get modified/cleaned data of a BO report in chunks of given rows, for reports too large to keep in memory
+def modify_raw_chunks(bo_raw, key_id, chunk_size, sheet_name='Report1', row_index=3, col_required=True, code=slice(3,7),
+                      row_ignore=[], usecols=None, dtype=None, filters=[]):
+    for df in read_bo_chunks(bo_raw, key_id, chunk_size, sheet_name=sheet_name, row_index=row_index, usecols=usecols,
+                             dtype=dtype, filters=filters, code=code if col_required else None,
+                             row_ignore=row_ignore if col_required else []):
+        yield clean_raw(df, key_id, col_required, code, row_ignore)
+
+def clean_raw(df, key_id, col_required=True, code=slice(3,7), row_ignore=[]):
+    df = df.dropna(subset=[key_id])
     # for data filtering, create new column with product code from contract
     if col_required:
-        new_column = pd.Series(df[key_id].str[code], index=df.index)
+        new_column = pd.Series(df[key_id].str[code], index=df.index, dtype='category')
         df.insert(0, 'Code', new_column)
         #exclude unnecessary rows by product codes
         df = df.loc[~df['Code'].isin(row_ignore)]
     # else remove non-digit data from key column
     else:
-        df[key_id].replace(regex=True, inplace=True, to_replace=r'\D', value=r'')
-    # exclude columns with blank data
-    df.dropna(axis=1, how='all', inplace=True)
-    df.to_excel(bo_file, sheet_name=sheet_name, float_format='%.2f', index=False, engine='openpyxl')
+        df[key_id] = df[key_id].replace(regex=True, to_replace=r'\D', value=r'')
+    return df
+
+# operators of row filters given as (column, operator, value) like pd.read_parquet filters
+comparisons = {'==': operator.eq, '!=': operator.ne, '<': operator.lt, '<=': operator.le, '>': operator.gt, '>=': operator.ge}
+
+# function to read a BO excel report row by row, keeping only required columns and rows with same result as pd.read_excel
+def read_bo(path, key_id, sheet_name='Report1', row_index=3, usecols=None, dtype=None, filters=[], code=None, row_ignore=[],
+            cache_dir=None):
+    # load already cleaned dataframe from disk cache when the BO file is unchanged
+    if cache_dir:
+        return cached_frame(path, read_bo, cache_dir, key_id=key_id, sheet_name=sheet_name, row_index=row_index,
+                            usecols=usecols, dtype=dtype, filters=filters, code=code, row_ignore=row_ignore)
+    header, rows = bo_records(iter_bo_rows(path, sheet_name), key_id, row_index, filters, code, row_ignore)
+    data = list(rows)
+    width = max([len(header)] + [len(row) for row in data])
+    return bo_frame(header, data, bo_columns(header, key_id, usecols, filters, width), dtype)
+
+# function to read a BO report in dataframes of given rows, streaming the file so memory does not grow with its size
+def read_bo_chunks(path, key_id, chunk_size, sheet_name='Report1', row_index=3, usecols=None, dtype=None, filters=[],
+                   code=None, row_ignore=[]):
+    header, rows = bo_records(iter_bo_rows(path, sheet_name, streaming=True), key_id, row_index, filters, code, row_ignore)
+    # columns beyond header are left out as each chunk must have the same columns
+    col_nos = bo_columns(header, key_id, usecols, filters, len(header))
+    chunk, chunks = [], 0
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == chunk_size:
+            yield bo_frame(header, chunk, col_nos, dtype)
+            chunk, chunks = [], chunks + 1
+    # at least one chunk, even if empty, so totals of chunks always have their shape
+    if chunk or not chunks:
+        yield bo_frame(header, chunk, col_nos, dtype)
+
+# function to get header and a generator of rows having key & matching filters, from rows of a BO report
+def bo_records(rows, key_id, row_index=3, filters=[], code=None, row_ignore=[]):
+    # header is the given row number of the sheet, blank rows included
+    for _ in range(row_index - 1):
+        next(rows, None)
+    header = next(rows, [])
+    key_no = header.index(key_id)
+    checks = [(header.index(col), op, value) for col, op, value in filters]
+    def records():
+        for row in rows:
+            key = row[key_no] if key_no < len(row) else None
+            # skip blank key rows & rows of ignored product codes while reading
+            if key is None or key in na_values or (code and isinstance(key, str) and key[code] in row_ignore):
+                continue
+            if all(bo_match(row[col_no] if col_no < len(row) else None, op, value) for col_no, op, value in checks):
+                yield row
+    return header, records()
+
+# function to get numbers of required columns, with key & filter columns
+def bo_columns(header, key_id, usecols=None, filters=[], width=0):
+    if usecols:
+        required = set(usecols) | {key_id} | {col for col, _, _ in filters}
+        return [col_no for col_no, name in enumerate(header) if name in required]
+    return list(range(width))
+
+# function to parse rows the same way as pd.read_excel, with explicit dtypes if given, amounts of dtype paisa in whole paisa
+def bo_frame(header, rows, col_nos, dtype=None):
+    from pandas.io.parsers import TextParser
+    data = [[row[col_no] if col_no < len(row) else None for col_no in col_nos] for row in [header] + rows]
+    amounts = [col for col, col_type in (dtype or {}).items() if col_type == 'paisa']
+    df = TextParser(data, header=0, dtype=dtype and {col: 'float64' if col in amounts else col_type
+                                                    for col, col_type in dtype.items()}).read()
+    for col in [col for col in amounts if col in df.columns]:
+        df[col] = parse_paisa(df[col])
+    return df
+
+# function to get rows of a BO report as lists of cell values, from a csv export or an excel sheet with calamine if
+# installed else openpyxl, openpyxl read only mode is used for streaming as calamine loads whole sheet at once
+def iter_bo_rows(path, sheet_name='Report1', streaming=False):
+    if path.lower().endswith('.csv'):
+        with open(path, newline='', encoding='utf-8-sig') as file:
+            for row in csv.reader(file):
+                yield bo_row(row)
+    elif module_exists('python_calamine') and not streaming:
+        from python_calamine import CalamineWorkbook
+        sheet = CalamineWorkbook.from_path(path).get_sheet_by_name(sheet_name)
+        # calamine rows start from first sheet row but from first non-empty column
+        padding = [None] * (sheet.start or (0, 0))[1]
+        for row in sheet.iter_rows():
+            yield bo_row(padding + row)
+    else:
+        from openpyxl import load_workbook
+        workbook = load_workbook(path, read_only=True, data_only=True)
+        try:
+            for row in workbook[sheet_name].iter_rows(values_only=True):
+                yield bo_row(row)
+        finally:
+            workbook.close()
+
+# function to convert cell values like pd.read_excel, integral numbers as int, dates as datetime, blank as None
+def bo_row(row):
+    values = []
+    for value in row:
+        if value == '':
+            value = None
+        elif isinstance(value, float) and value.is_integer():
+            value = int(value)
+        elif isinstance(value, date) and not isinstance(value, datetime):
+            value = datetime(value.year, value.month, value.day)
+        values.append(value)
+    # trailing blank cells are not part of the row
+    while values and values[-1] is None:
+        values.pop()
+    return values
+
+# function to check a cell value against a row filter, rows not comparable are kept for dataframe filters
+def bo_match(value, op, target):
+    if op == 'in':
+        return value in target
+    if op == 'not in':
+        return value not in target
+    if value is None:
+        return op == '!='
+    try:
+        if isinstance(target, pd.Timestamp):
+            value = pd.Timestamp(value)
+        return comparisons[op](value, target)
+    except (TypeError, ValueError):
+        return True
+
+# formats of output files by extension, parquet & csv workbooks are directories with a file for each sheet
+output_formats = ['xlsx', 'parquet', 'csv']
+
+# rows & columns of an excel sheet
+max_sheet_rows, max_sheet_cols = 1048576, 16384
+
+# class to buffer dataframes as sheets of an output file and write the workbook once with a streaming engine
+class OutputFile:
+    def __init__(self, path, engine=None, enabled=True):
+        self.path = path
+        self.enabled = enabled
+        self.format = os.path.splitext(path)[1][1:].lower()
+        self.engine = engine or ('xlsxwriter' if module_exists('xlsxwriter') else 'openpyxl')
+        self.sheets = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.save()
+
+    # add dataframe as a sheet, number formats and fixed widths given by column name, amounts in paisa are written in taka
+    def add(self, df, sheet_name, index=False, formats={}, widths={}):
+        if self.enabled:
+            # excel writers silently skip cells past the last row & column, so too large sheets are errors like to_excel
+            rows, cols = len(df) + 1, len(df.columns) + (df.index.nlevels if index else 0)
+            if self.format == 'xlsx' and (rows > max_sheet_rows or cols > max_sheet_cols):
+                raise ValueError(f"This sheet is too large! Your sheet size is: {rows}, {cols} "
+                                 f"Max sheet size is: {max_sheet_rows}, {max_sheet_cols}")
+            self.sheets.append((sheet_name, taka_frame(df), index, formats, widths))
+
+    # write workbook, in background if saved by a task of a running task graph
+    def save(self):
+        if not self.enabled or not self.sheets:
+            return
+        # shallow copies, so columns added to dataframes after saving are not written
+        sheets, self.sheets = [(sheet_name, df.copy(deep=False), *args) for sheet_name, df, *args in self.sheets], []
+        if background_writer and getattr(writes_local, 'writes', None) is not None:
+            writes_local.writes.append(background_writer.submit(self.write, sheets))
+        else:
+            self.write(sheets)
+
+    def write(self, sheets):
+        if self.format in ['parquet', 'csv']:
+            with stage(f'{self.format} writing', file=os.path.basename(self.path)):
+                self.save_tables(sheets)
+            return
+        with stage('excel writing & formatting', file=os.path.basename(self.path)):
+            if self.engine == 'xlsxwriter':
+                self.save_xlsxwriter(sheets)
+            else:
+                self.save_openpyxl(sheets)
+
+    # sheets of previous run are removed, as sheets of branches without amount are not written again
+    def save_tables(self, sheets):
+        os.makedirs(self.path, exist_ok=True)
+        for entry in os.scandir(self.path):
+            if entry.name.endswith(f'.{self.format}'):
+                os.remove(entry.path)
+        for sheet_name, df, index, formats, widths in sheets:
+            write_table(df, os.path.join(self.path, f'{sheet_name}.{self.format}'), index)
+
+    # formats are set once per column and applied by xlsxwriter while writing cells
+    def save_xlsxwriter(self, sheets):
+        import xlsxwriter
+        # constant memory mode keeps only the current row in memory, so rows are written in order
+        workbook = xlsxwriter.Workbook(self.path, {'constant_memory': True})
+        header_format = workbook.add_format({'bold': True, 'border': 1, 'align': 'center', 'valign': 'top'})
+        date_format = workbook.add_format({'num_format': 'yyyy-mm-dd hh:mm:ss'})
+        num_formats = {}
+        for sheet_name, df, index, formats, widths in sheets:
+            worksheet = workbook.add_worksheet(sheet_name)
+            cols = sheet_columns(df, index)
+            col_formats = []
+            for col_no, (col, width) in enumerate(zip(cols, column_widths(df, index))):
+                if col in formats and formats[col] not in num_formats:
+                    num_formats[formats[col]] = workbook.add_format({'num_format': formats[col]})
+                col_formats.append(num_formats[formats[col]] if col in formats else None)
+                worksheet.set_column(col_no, col_no, widths.get(col, width), col_formats[-1])
+            rows = sheet_rows(df, index)
+            worksheet.write_row(0, 0, next(rows), header_format)
+            for row_no, row in enumerate(rows, start=1):
+                for col_no, value in enumerate(row):
+                    if value is None:
+                        continue
+                    if hasattr(value, 'year'):
+                        worksheet.write_datetime(row_no, col_no, value, col_formats[col_no] or date_format)
+                    else:
+                        worksheet.write(row_no, col_no, value)
+        workbook.close()
+
+    # write only cells of formatted columns share one named style
+    def save_openpyxl(self, sheets):
+        from openpyxl import Workbook
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Alignment, Border, Font, NamedStyle, Side
+        from openpyxl.utils import get_column_letter
+        workbook = Workbook(write_only=True)
+        side = Side(style='thin')
+        header_style = NamedStyle('sheet_header', font=Font(bold=True), border=Border(side, side, side, side),
+                                  alignment=Alignment(horizontal='center', vertical='top'))
+        workbook.add_named_style(header_style)
+        num_styles = {}
+        for sheet_name, df, index, formats, widths in sheets:
+            worksheet = workbook.create_sheet(sheet_name)
+            cols = sheet_columns(df, index)
+            for col_no, (col, width) in enumerate(zip(cols, column_widths(df, index)), start=1):
+                worksheet.column_dimensions[get_column_letter(col_no)].width = widths.get(col, width)
+            col_styles = []
+            for col in cols:
+                if col in formats and formats[col] not in num_styles:
+                    num_styles[formats[col]] = NamedStyle(f'number_{len(num_styles)}', number_format=formats[col])
+                    workbook.add_named_style(num_styles[formats[col]])
+                col_styles.append(num_styles[formats[col]].name if col in formats else None)
+            rows = sheet_rows(df, index)
+            worksheet.append([styled_cell(WriteOnlyCell(worksheet, value), header_style.name) for value in next(rows)])
+            for row in rows:
+                if formats:
+                    row = [styled_cell(WriteOnlyCell(worksheet, value), style) if style else value
+                           for value, style in zip(row, col_styles)]
+                worksheet.append(row)
+        workbook.save(self.path)
+
+# function to write a dataframe as parquet or csv by extension, mixed type columns are written as text in parquet
+def write_table(df, path, index=False):
+    if path.endswith('.csv'):
+        df.to_csv(path, index=index)
+        return
+    try:
+        df.to_parquet(path, index=index)
+    except (TypeError, ValueError):
+        df = df.copy(deep=False)
+        for col in df.select_dtypes('object').columns:
+            df[col] = df[col].map(lambda value: None if pd.isna(value) else str(value))
+        df.to_parquet(path, index=index)
+
+# class to write output workbooks in a background thread, blocking tasks saving more than max pending workbooks so
+# dataframes waiting to be written are bounded
+class Writer:
+    def __init__(self, max_pending=4):
+        self.executor = ThreadPoolExecutor(1)
+        self.slots = BoundedSemaphore(max_pending)
+
+    # function to write in background with stage records & tags of the calling task
+    def submit(self, func, *args):
+        records, tags = getattr(stage_local, 'records', None), getattr(stage_local, 'tags', {})
+        def write():
+            stage_local.records, stage_local.tags = records, tags
+            try:
+                return func(*args)
+            finally:
+                stage_local.records, stage_local.tags = None, {}
+                self.slots.release()
+        self.slots.acquire()
+        return self.executor.submit(write)
+
+    def shutdown(self):
+        self.executor.shutdown()
+
+# writer of the running task graph, output files of a task are kept with it in thread local
+background_writer = None
+writes_local = local()
+
+# forked worker processes write their output files themselves
+def reset_writer():
+    global background_writer
+    background_writer = None
+
+if hasattr(os, 'register_at_fork'): #not on windows
+    os.register_at_fork(after_in_child=reset_writer)
+
+def styled_cell(cell, style):
+    cell.style = style
+    return cell
+
+# function to get width of each sheet column from its longest value, floats measured as formatted with commas
+def column_widths(df, index=False):
+    df = df.reset_index() if index else df
+    widths = []
+    for col in df.columns:
+        values = df[col].dropna()
+        if not len(values):
+            length = 0
+        elif pd.api.types.is_float_dtype(values):
+            length = max(len(f'{values.min():,.2f}'), len(f'{values.max():,.2f}'))
+        elif pd.api.types.is_integer_dtype(values):
+            length = max(len(str(values.min())), len(str(values.max())))
+        else:
+            length = values.astype(str).str.len().max()
+        widths.append((max(length, len(str(col))) + 2) * 1.11)
+    return widths
+
+# function to get column names of a sheet written from dataframe
+def sheet_columns(df, index=False):
+    return ([df.index.name or ''] if index else []) + [str(col) for col in df.columns]
+
+# function to get rows of a sheet from dataframe with header and blanks as None
+def sheet_rows(df, index=False):
+    yield sheet_columns(df, index)
+    df = df.reset_index() if index else df
+    # convert in blocks of rows so a large dataframe is not copied at once
+    for start in range(0, len(df), 10000):
+        block = df.iloc[start:start+10000]
+        for row in block.astype(object).where(block.notna(), None).itertuples(index=False, name=None):
+            yield [cell_value(value) for value in row]
+
+# function to convert a dataframe value to excel cell value, rounding floats like float_format='%.2f'
+def cell_value(value):
+    if isinstance(value, float):
+        return float('%.2f' % value)
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    return value
+
+# function to check if an optional module is installed
+def module_exists(name):
+    from importlib.util import find_spec
+    return find_spec(name) is not None
+
+rss_bytes = rss_function()
+
+# class to run functions as a graph of tasks, each task started as soon as the tasks it depends on are done
+class TaskGraph:
+    def __init__(self, workers=1, store=None, profiler=None, prefetch=None, max_writes=4, job_dir=None):
+        self.workers = workers
+        # tasks of heavy parsing are run by workers of a shared job directory if given, else by local processes
+        self.job_dir = job_dir
+        self.store = store
+        self.profiler = profiler
+        # inputs read ahead of tasks using them & output workbooks waiting to be written, to keep memory bounded
+        self.prefetch = prefetch or max(4, 2 * workers)
+        self.max_writes = max_writes
+        self.tasks = {}
+
+    # add a task once by name, tasks in arguments are replaced by their results; changed tasks of a batch run together
+    # in one call of func with a list of their arguments, returning a list of their results
+    def add(self, name, func, *args, process=False, after=[], inputs=[], outputs=[], store=True, tags={}, prefetch=False,
+            batch=None):
+        if name not in self.tasks:
+            self.tasks[name] = Task(name, func, args, process, after, inputs, outputs, store, tags, prefetch, batch)
+        return self.tasks[name]
+
+    # run all tasks in threads, tasks of heavy parsing in processes if more than one worker, and call on_done for each task
+    # once its output files are written; as a pipeline, inputs are read ahead while tasks compute and a writer thread
+    # writes output workbooks
+    def run(self, on_done=None):
+        global background_writer
+        load_module(pd) #before tasks use pandas in threads
+        tasks = list(self.tasks.values())
+        if self.store:
+            self.plan(tasks)
+        for task in [task for task in tasks if task.done and on_done]:
+            on_done(task)
+        dependents = {task: [] for task in tasks}
+        for task in tasks:
+            for dep in task.deps:
+                dependents.setdefault(dep, []).append(task)
+        waiting = [task for task in tasks if not task.done]
+        running, writing, prefetched, batches = {}, {}, set(), {}
+        # function to free results of read inputs once all tasks using them are done
+        def release(task):
+            for dep in task.deps + [task]:
+                if dep in prefetched and all(user.done for user in dependents[dep]):
+                    prefetched.remove(dep)
+                    dep.result = None
+        # function to finish a task once its output files are written
+        def complete(task, records):
+            if self.profiler and records:
+                self.profiler.add(records)
+            if self.store and task.store and not task.error:
+                self.store.save(task)
+            if on_done:
+                on_done(task)
+        threads = ThreadPoolExecutor()
+        processes = None
+        if self.job_dir and any(task.process for task in waiting):
+            processes = JobQueue(self.job_dir, self.workers)
+        elif self.workers > 1 and any(task.process for task in waiting):
+            processes = ProcessPoolExecutor(self.workers)
+        background_writer = Writer(self.max_writes)
+        try:
+            while waiting or running or writing:
+                ready = [task for task in waiting if all(dep.done for dep in task.deps)]
+                started = False
+                # inputs kept only for a batch are not counted, as a batch needs inputs of all its tasks at once
+                held = sum(1 for dep in prefetched if any(not user.done and not user.batch for user in dependents[dep]))
+                for task in ready:
+                    if task not in waiting: #run with its batch
+                        continue
+                    if task.prefetch and held >= self.prefetch and running: #read when earlier inputs are used
+                        continue
+                    # a batch runs once all its tasks are ready
+                    members = [other for other in waiting if other.batch == task.batch] if task.batch else [task]
+                    if not all(dep.done for member in members for dep in member.deps):
+                        continue
+                    started = True
+                    for member in members:
+                        waiting.remove(member)
+                        failed = [dep for dep in member.deps if dep.error]
+                        if failed: #tasks depending on a failed task are not run
+                            member.finish(error=failed[0].error)
+                            release(member)
+                            complete(member, None)
+                    members = [member for member in members if not member.done]
+                    if not members:
+                        continue
+                    task = members[0]
+                    executor = processes if task.process and processes else threads
+                    if task.batch:
+                        name, tags = task.batch, {key: value for key, value in task.tags.items() if key != 'branch'}
+                        args = [[[task_result(arg) for arg in member.args] for member in members]]
+                        batches[task] = members
+                    else:
+                        name, tags, args = task.name, task.tags, [task_result(arg) for arg in task.args]
+                    # stages of task are timed in the thread or process running it
+                    running[executor.submit(run_task, name, tags, task.func, args,
+                                            self.profiler.cprofile_dir if self.profiler else None, bool(self.profiler))] = task
+                    if task.prefetch:
+                        prefetched.add(task)
+                        held += 1
+                if not running and not writing:
+                    if started: #dependents of failed tasks may be ready now
+                        continue
+                    raise ValueError(f"Tasks depend on tasks of another graph: {[task.name for task in waiting]}")
+                done, _ = wait(list(running) + [write for writes, records in writing.values() for write in writes],
+                               return_when=FIRST_COMPLETED)
+                for future in [future for future in done if future in running]:
+                    task = running.pop(future)
+                    members = batches.pop(task, [task])
+                    try:
+                        result, records, writes = future.result()
+                        for member, member_result in zip(members, result if task.batch else [result]):
+                            member.finish(result=member_result)
+                    except Exception as e:
+                        for member in members:
+                            member.finish(error=e)
+                        records, writes = None, []
+                    # stage records of a batch are added once
+                    for member in members:
+                        writing[member] = (writes, records if member is task else None)
+                        release(member)
+                # tasks are complete once their output files and those of tasks they depend on are written, failing if any failed
+                written = True
+                while written:
+                    written = False
+                    for task in [task for task, (writes, records) in writing.items() if all(write.done() for write in writes)
+                                 and not any(dep in writing for dep in task.deps)]:
+                        writes, records = writing.pop(task)
+                        errors = [write.exception() for write in writes if write.exception()] + [dep.error for dep in task.deps if dep.error]
+                        if errors and not task.error:
+                            task.error = errors[0]
+                        complete(task, records)
+                        written = True
+        finally:
+            background_writer.shutdown()
+            background_writer = None
+            threads.shutdown(cancel_futures=True)
+            if processes:
+                processes.shutdown(cancel_futures=True)
+            if self.store:
+                self.store.flush()
+        return self.tasks
+
+    # function to finish tasks unchanged since last run, with stored results only if a changed task needs them
+    def plan(self, tasks):
+        for task in tasks:
+            self.store.check(task)
+        required = set()
+        for task in reversed(tasks):
+            if task.fresh and task in required:
+                try:
+                    task.finish(result=self.store.load(task))
+                    continue
+                except Exception: #unreadable result is computed again
+                    task.fresh = False
+            if task.fresh:
+                task.finish()
+            elif task.store or task in required:
+                required.update(task.deps)
+            else: #task only loads input for unchanged tasks
+                task.fresh = True
+                task.finish()
+
+class Task:
+    def __init__(self, name, func, args, process=False, after=[], inputs=[], outputs=[], store=True, tags={}, prefetch=False,
+                 batch=None):
+        self.name = name
+        self.func = func
+        self.args = args
+        self.process = process
+        self.prefetch = prefetch
+        self.batch = batch
+        self.deps = list(dict.fromkeys(task_deps(args) + list(after)))
+        self.inputs = inputs
+        self.outputs = outputs
+        self.store = store
+        self.tags = tags
+        self.hashes = {}
+        self.key = None
+        self.fresh = False
+        self.done = False
+        self.result = None
+        self.error = None
+
+    def finish(self, result=None, error=None):
+        self.result = result
+        self.error = error
+        self.done = True
+
+# function to get tasks given in arguments, directly or inside lists, tuples & dicts
+def task_deps(args):
+    deps = []
+    for arg in args:
+        if isinstance(arg, Task):
+            deps.append(arg)
+        elif isinstance(arg, (list, tuple)):
+            deps += task_deps(arg)
+        elif isinstance(arg, dict):
+            deps += task_deps(list(arg.values()))
+    return deps
+
+# function to replace tasks in an argument with their results, or with other values of tasks if given
+def task_result(arg, value=lambda task: task.result):
+    if isinstance(arg, Task):
+        return value(arg)
+    if isinstance(arg, (list, tuple)):
+        return type(arg)(task_result(item, value) for item in arg)
+    if isinstance(arg, dict):
+        return {key: task_result(item, value) for key, item in arg.items()}
+    return arg
+
+# class to run functions as jobs of a directory on a shared filesystem, claimed by worker processes of this and other
+# machines with atomic renames, so no broker is needed; jobs of workers not seen working for timeout seconds are given
+# to other workers up to given retries, and local workers are started to work along with workers of other machines
+class JobQueue:
+    def __init__(self, job_dir, local_workers=1, timeout=30, retries=3, poll=0.1):
+        self.dirs = job_dirs(job_dir)
+        self.timeout = timeout
+        self.retries = retries
+        self.poll = poll
+        self.run_id = f'{host_name()}-{os.getpid()}-{int(time() * 1000)}'
+        self.count = 0
+        self.futures, self.attempts, self.claims = {}, {}, {}
+        self.lock = Lock()
+        # local workers are spawned, as threads of this process may hold locks when forking
+        context = multiprocessing.get_context('spawn')
+        self.stop = context.Event()
+        self.workers = [context.Process(target=work, args=(job_dir,), kwargs={'stop': self.stop}, daemon=True)
+                        for _ in range(local_workers)]
+        for worker in self.workers:
+            worker.start()
+        self.stopped = Event()
+        self.poller = Thread(target=self.collect_loop, daemon=True)
+        self.poller.start()
+
+    # write job file atomically, so workers never claim a half written job
+    def submit(self, func, *args):
+        future = Future()
+        with self.lock:
+            self.count += 1
+            job_id = f'{self.run_id}_{self.count:06d}'
+        try:
+            data = pickle.dumps((func, args), pickle.HIGHEST_PROTOCOL)
+        except Exception as e:
+            future.set_exception(e)
+            return future
+        temp_file = os.path.join(self.dirs['pending'], f'{job_id}.tmp')
+        with open(temp_file, 'wb') as file:
+            file.write(data)
+        with self.lock:
+            self.futures[job_id], self.attempts[job_id] = future, 1
+        os.replace(temp_file, os.path.join(self.dirs['pending'], f'{job_id}.job'))
+        return future
+
+    def collect_loop(self):
+        while not self.stopped.wait(self.poll):
+            self.collect()
+
+    # function to set results of finished jobs and give jobs of stopped workers to others
+    def collect(self):
+        for name in os.listdir(self.dirs['results']):
+            job_id = name[:-len('.result')]
+            if not name.endswith('.result') or not job_id.startswith(f'{self.run_id}_'): #job of another run
+                continue
+            path = os.path.join(self.dirs['results'], name)
+            if job_id not in self.futures: #second result of a job run again after its worker seemed stopped
+                remove_file(path)
+                continue
+            try:
+                with open(path, 'rb') as file:
+                    status, value = pickle.load(file)
+                os.remove(path)
+            except (OSError, EOFError, pickle.UnpicklingError): #result being replaced by another worker of the job
+                continue
+            with self.lock:
+                future = self.futures.pop(job_id)
+            if future.done():
+                continue
+            if status == 'ok':
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+        # a claim is stale once its heartbeat time is unchanged for timeout seconds of this machine, whatever the clocks
+        # of worker machines
+        now = time()
+        for name in os.listdir(self.dirs['claimed']):
+            job_id = name.split('.')[0]
+            if job_id not in self.futures:
+                continue
+            path = os.path.join(self.dirs['claimed'], name)
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except OSError: #job finished meanwhile
+                continue
+            if self.claims.get(name, (None,))[0] != mtime:
+                self.claims[name] = (mtime, now)
+                continue
+            if now - self.claims[name][1] < self.timeout:
+                continue
+            del self.claims[name]
+            if self.attempts[job_id] > self.retries:
+                with self.lock:
+                    future = self.futures.pop(job_id)
+                future.set_exception(RuntimeError(f"Job {job_id} was stopped on {self.retries + 1} workers"))
+                remove_file(path)
+                continue
+            self.attempts[job_id] += 1
+            try:
+                os.rename(path, os.path.join(self.dirs['pending'], f'{job_id}.job'))
+            except OSError: #finished by the worker meanwhile
+                pass
+        # forget heartbeats of finished jobs
+        for name in [name for name in self.claims if name.split('.')[0] not in self.futures]:
+            del self.claims[name]
+
+    # stop collecting & local workers, jobs not claimed yet are removed if cancelled
+    def shutdown(self, cancel_futures=False):
+        self.stopped.set()
+        self.poller.join()
+        if cancel_futures:
+            for job_id in list(self.futures):
+                remove_file(os.path.join(self.dirs['pending'], f'{job_id}.job'))
+                self.futures.pop(job_id).cancel()
+        self.stop.set()
+        for worker in self.workers:
+            worker.join(self.timeout)
+            if worker.is_alive():
+                worker.terminate()
+
+# function to create directories of a job queue, returns them by name
+def job_dirs(job_dir):
+    dirs = {name: os.path.join(job_dir, name) for name in ['pending', 'claimed', 'results']}
+    for path in dirs.values():
+        os.makedirs(path, exist_ok=True)
+    return dirs
+
+# name of this machine without dots, as dots separate parts of job file names
+def host_name():
+    return socket.gethostname().replace('.', '_')
+
+def remove_file(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+# function to run jobs of a job directory as a worker, started in the same working directory as the app giving jobs but
+# on any machine sharing it, until stopped or idle for given seconds
+def work(job_dir, stop=None, max_idle=None, heartbeat=5, poll=0.2):
+    dirs = job_dirs(job_dir)
+    worker = f'{host_name()}-{os.getpid()}'
+    idle_since = time()
+    while not (stop and stop.is_set()):
+        job = claim_job(dirs, worker)
+        if job:
+            run_job(dirs, *job, heartbeat)
+            idle_since = time()
+        elif max_idle is not None and time() - idle_since > max_idle:
+            return
+        else:
+            sleep(poll)
+
+# function to claim the oldest pending job by renaming it, only one worker can rename a file
+def claim_job(dirs, worker):
+    for name in sorted(os.listdir(dirs['pending'])):
+        if not name.endswith('.job'):
+            continue
+        job_id = name[:-len('.job')]
+        claim_file = os.path.join(dirs['claimed'], f'{job_id}.{worker}.job')
+        try:
+            os.rename(os.path.join(dirs['pending'], name), claim_file)
+            return job_id, claim_file
+        except OSError: #claimed by another worker
+            continue
+    return None
+
+# function to run a claimed job and write its result, touching the claim file meanwhile to show the worker is alive
+def run_job(dirs, job_id, claim_file, heartbeat=5):
+    done = Event()
+    def beat():
+        while not done.wait(heartbeat):
+            try:
+                os.utime(claim_file)
+            except OSError: #claim given to another worker
+                return
+    Thread(target=beat, daemon=True).start()
+    try:
+        with open(claim_file, 'rb') as file:
+            func, args = pickle.load(file)
+        result = ('ok', func(*args))
+    except Exception as e:
+        result = ('error', e)
+    finally:
+        done.set()
+    try:
+        data = pickle.dumps(result, pickle.HIGHEST_PROTOCOL)
+    except Exception as e: #error not picklable
+        data = pickle.dumps(('error', RuntimeError(repr(result[1]) if result[0] == 'error' else str(e))))
+    temp_file = os.path.join(dirs['results'], f'{job_id}.{os.getpid()}.tmp')
+    with open(temp_file, 'wb') as file:
+        file.write(data)
+    os.replace(temp_file, os.path.join(dirs['results'], f'{job_id}.result'))
+    remove_file(claim_file)
+
+# class to keep results of tasks with content hash of their input files and fingerprint of their output files, so
+# later runs only recompute tasks whose inputs, arguments or outputs changed
+class ResultStore:
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        self.manifest_file = os.path.join(store_dir, 'manifest.json')
+        try:
+            with open(self.manifest_file) as file:
+                self.manifest = json.load(file)
+        except (OSError, ValueError):
+            self.manifest = {'files': {}, 'tasks': {}}
+
+    # function to get content hash of a file, hashed again only if its size or modified time changed since last run
+    def file_hash(self, path):
+        path = os.path.abspath(path)
+        try:
+            fingerprint = file_fingerprint(path, content=False)
+            known = self.manifest['files'].get(path)
+            if not known or known['size'] != fingerprint['size'] or known['mtime'] != fingerprint['mtime']:
+                known = self.manifest['files'][path] = file_fingerprint(path)
+            return known['sha256']
+        except OSError: #missing file, task runs and reports it
+            return None
+
+    # function to set key of a task from its function & version of its code, arguments, input files & keys of tasks it
+    # depends on, and check if result of the same key is stored with unchanged output files
+    def check(self, task):
+        task.hashes = {path: self.file_hash(path) for path in task.inputs}
+        for dep in task.deps:
+            task.hashes.update(dep.hashes)
+        args = pickle.dumps(task_result(task.args, lambda dep: dep.key))
+        key = (f"{task.func.__module__}.{task.func.__qualname__}|{code_version(task.func.__module__, __name__)}|"
+               f"{[dep.key for dep in task.deps]}|{task.hashes}|{task.outputs}|")
+        task.key = hashlib.sha1(key.encode() + args).hexdigest()
+        entry = self.manifest['tasks'].get(task.name)
+        task.fresh = (task.store and entry is not None and entry['key'] == task.key
+                      and os.path.exists(self.result_file(task.key))
+                      and all(same_file(fingerprint, path) for path, fingerprint in entry['outputs'].items()))
+
+    def result_file(self, key):
+        return os.path.join(self.store_dir, f'{key}.pkl')
+
+    def load(self, task):
+        with open(self.result_file(task.key), 'rb') as file:
+            return pickle.load(file)
+
+    # function to keep result of a task and record its input & output files in manifest
+    def save(self, task):
+        os.makedirs(self.store_dir, exist_ok=True)
+        result_file = self.result_file(task.key)
+        temp_file = f'{result_file}.{os.getpid()}.{get_ident()}.tmp'
+        with open(temp_file, 'wb') as file:
+            pickle.dump(task.result, file)
+        os.replace(temp_file, result_file)
+        old = self.manifest['tasks'].get(task.name)
+        if old and old['key'] != task.key and os.path.exists(self.result_file(old['key'])):
+            os.remove(self.result_file(old['key']))
+        outputs = {path: file_fingerprint(path, content=False) for path in task.outputs if os.path.exists(path)}
+        self.manifest['tasks'][task.name] = {'key': task.key, 'inputs': task.hashes, 'outputs': outputs}
+
+    def flush(self):
+        os.makedirs(self.store_dir, exist_ok=True)
+        write_json(self.manifest_file, self.manifest)
+
+    # function to remove all stored results, so the next run recomputes every task
+    def clear(self):
+        for name in [name for name in self.manifest['tasks']]:
+            key = self.manifest['tasks'].pop(name)['key']
+            if os.path.exists(self.result_file(key)):
+                os.remove(self.result_file(key))
+
+# function to sum values of every branch by catagory in one pass, catagory of rows assigned through mapping table
+@staged('aggregation')
+def branch_pivot(df, br_col, value_col, br_codes, cat_col=None, mapping=None, paisa=False):
+    if cat_col:
+        catagories = list(dict.fromkeys(mapping.values()))
+        keys = df[cat_col].map(mapping)
+    else:
+        catagories = ['Total']
+        keys = pd.Series('Total', index=df.index)
+    values = to_paisa(df[value_col]) if paisa else df[value_col]
+    # rows with unmapped catagory or branch are left out, missing combinations are zero
+    df_sum = values.groupby([keys, df[br_col]], observed=True).sum().unstack(fill_value=0)
+    return df_sum.reindex(index=catagories, columns=br_codes, fill_value=0)
+
+# amounts parsed in whole paisa are kept in nullable integer columns, so sums are exact and blanks stay blank
+paisa_dtype = 'Int64'
+# amount text like 1,234.56 or -0.5
+amount_text = r'^(-?)(\d+)(?:\.(\d{1,2}))?$'
+
+# function to convert taka amounts into whole paisa, so sums are exact whatever the order of adding
+def to_paisa(amounts):
+    if amounts.dtype == paisa_dtype:
+        return amounts.fillna(0).astype('int64')
+    return (amounts.fillna(0) * 100).round().astype('int64')
+
+# function to parse amounts into whole paisa, text exactly by its digits and numbers by rounding, e.g. excel cells which
+# are exact in paisa up to billions of taka
+def parse_paisa(values):
+    if values.dtype != object:
+        return (pd.to_numeric(values, errors='coerce') * 100).round().astype(paisa_dtype)
+    text = values.where(values.map(type) == str).str.replace(',', '', regex=False).str.strip()
+    parts = text.str.extract(amount_text)
+    paisa = parts[1].astype(paisa_dtype) * 100 + parts[2].fillna('0').str.ljust(2, '0').astype(paisa_dtype)
+    paisa = paisa.where(parts[0] != '-', -paisa)
+    # numbers and text in other forms like 1e6 are rounded
+    other = paisa.isna() & values.notna()
+    if other.any():
+        numbers = pd.to_numeric(values[other].map(lambda value: value.replace(',', '') if isinstance(value, str) else value),
+                                errors='coerce')
+        paisa[other] = (numbers * 100).round().astype(paisa_dtype)
+    return paisa
+
+# function to get dataframe with amounts in paisa converted to taka for writing
+def taka_frame(df):
+    cols = [col for col, col_type in df.dtypes.items() if col_type == paisa_dtype]
+    if not cols:
+        return df
+    df = df.copy(deep=False)
+    for col in cols:
+        df[col] = df[col].astype('float64') / 100
+    return df
+
+# function to add up totals of dataframe chunks, each reducer giving a total of a chunk in paisa, totals returned in taka
+# or in paisa if exact
+def sum_chunks(chunks, *reducers, exact=False):
+    totals = [0] * len(reducers)
+    for df in chunks:
+        totals = [total + reducer(df) for total, reducer in zip(totals, reducers)]
+    if exact:
+        return [total.astype(paisa_dtype) if isinstance(total, (pd.Series, pd.DataFrame)) else int(total) for total in totals]
+    return [total / 100 for total in totals]
+
+# function to get a file's fingerprint with path, size, modified time and optionally content hash
+def file_fingerprint(path, content=True):
+    stat = os.stat(path)
+    fingerprint = {'path': os.path.abspath(path), 'size': stat.st_size, 'mtime': stat.st_mtime_ns}
+    if content:
+        sha = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for block in iter(lambda: file.read(1 << 20), b''):
+                sha.update(block)
+        fingerprint['sha256'] = sha.hexdigest()
+    return fingerprint
+
+# function to get hash of source files of given modules, so stored results & parsed files of an older version of the app
+# are not used; a frozen app has no source files, so its executable is used
+@cache
+def code_version(*modules):
+    digest = hashlib.sha1()
+    for name in modules:
+        path = getattr(sys.modules.get(name), '__file__', None)
+        if getattr(sys, 'frozen', False) or not path or not os.path.exists(path):
+            stat = os.stat(sys.executable)
+            digest.update(f'{stat.st_size}|{stat.st_mtime_ns}'.encode())
+            continue
+        with open(path, 'rb') as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+# function to get cache entry paths for a source file parsed with given reader and arguments
+def cache_entry(path, reader, cache_dir, **kwargs):
+    key = f"{os.path.abspath(path)}|{reader.__name__}|{sorted(kwargs.items())}|{code_version(__name__)}"
+    name = hashlib.sha1(key.encode()).hexdigest()
+    return os.path.join(cache_dir, f'{name}.json'), os.path.join(cache_dir, name)
+
+# function to load a parsed dataframe from memory or disk cache or parse and store it when missing/stale
+def cached_frame(path, reader, cache_dir, **kwargs):
+    meta_file, data_file = cache_entry(path, reader, cache_dir, **kwargs)
+    if hot_cache: #copy, as callers may change the dataframe in place
+        df = hot_cache.get(meta_file, hot_fingerprint(path))
+        if df is not None:
+            return df.copy()
+        fingerprint = hot_fingerprint(path)
+        df = disk_cached_frame(path, reader, meta_file, data_file, cache_dir, **kwargs)
+        hot_cache.put(meta_file, fingerprint, df)
+        return df.copy()
+    return disk_cached_frame(path, reader, meta_file, data_file, cache_dir, **kwargs)
+
+def disk_cached_frame(path, reader, meta_file, data_file, cache_dir, **kwargs):
+    fingerprint = file_fingerprint(path, content=False)
+    try:
+        with open(meta_file) as file:
+            meta = json.load(file)
+        # same size & mtime means unchanged file, otherwise compare content hash (e.g. file copied again)
+        fresh = meta['size'] == fingerprint['size'] and meta['mtime'] == fingerprint['mtime']
+        if not fresh and meta['size'] == fingerprint['size']:
+            fingerprint = file_fingerprint(path)
+            fresh = meta['sha256'] == fingerprint['sha256']
+            if fresh: #keep the entry with new mtime for faster lookup next time
+                write_json(meta_file, fingerprint | {'format': meta['format'], 'version': meta['version']})
+        if fresh:
+            return read_frame(data_file, meta['format'])
+        remove_cache_entry(meta_file, data_file)
+    except (OSError, ValueError, KeyError):
+        pass
+    # parse source file and store dataframe with fingerprint taken before parsing
+    if 'sha256' not in fingerprint:
+        fingerprint = file_fingerprint(path)
+    df = reader(path, **kwargs)
+    os.makedirs(cache_dir, exist_ok=True)
+    write_json(meta_file, fingerprint | {'format': write_frame(df, data_file), 'version': code_version(__name__)})
     return df
+
+# class to keep parsed inputs in memory of a long running process, least recently used evicted beyond max items;
+# each value is kept with size & modified time of its file so a changed file is parsed again
+class HotCache:
+    def __init__(self, max_items=64):
+        self.max_items = max_items
+        self.items = OrderedDict()
+        self.lock = Lock()
+
+    def get(self, key, fingerprint):
+        with self.lock:
+            item = self.items.get(key)
+            if item is None or item[0] != fingerprint:
+                return None
+            self.items.move_to_end(key)
+            return item[1]
+
+    def put(self, key, fingerprint, value):
+        with self.lock:
+            self.items[key] = (fingerprint, value)
+            self.items.move_to_end(key)
+            while len(self.items) > self.max_items:
+                self.items.popitem(last=False)
+
+# parsed inputs kept in memory only if enabled with keep_hot, e.g. by watch mode
+hot_cache = None
+
+def keep_hot(max_items=64):
+    global hot_cache
+    hot_cache = HotCache(max_items) if max_items else None
+
+# forked worker processes keep parsed inputs of the parent with a lock of their own
+def reset_hot_cache():
+    if hot_cache:
+        hot_cache.lock = Lock()
+
+if hasattr(os, 'register_at_fork'): #not on windows
+    os.register_at_fork(after_in_child=reset_hot_cache)
+
+def hot_fingerprint(path):
+    stat = os.stat(path)
+    return stat.st_size, stat.st_mtime_ns
+
+# function to remove cache entries whose source files are deleted or modified, or parsed by an older version of the app
+def evict_cache(cache_dir):
+    if not os.path.isdir(cache_dir):
+        return
+    for name in [file for file in os.listdir(cache_dir) if file.endswith('.json')]:
+        meta_file = os.path.join(cache_dir, name)
+        try:
+            with open(meta_file) as file:
+                meta = json.load(file)
+            if meta['version'] == code_version(__name__) and same_file(meta, meta['path']):
+                continue
+        except (OSError, ValueError, KeyError):
+            pass
+        remove_cache_entry(meta_file, meta_file[:-len('.json')])
+
+# function to check if a file is unchanged from its fingerprint, by content hash if size is same but modified time not
+def same_file(fingerprint, path):
+    try:
+        current = file_fingerprint(path, content=False)
+    except OSError:
+        return False
+    if fingerprint['size'] != current['size']:
+        return False
+    if fingerprint['mtime'] == current['mtime']:
+        return True
+    return 'sha256' in fingerprint and fingerprint['sha256'] == file_fingerprint(path)['sha256']
+
+def remove_cache_entry(meta_file, data_file):
+    for file in [meta_file, f'{data_file}.parquet', f'{data_file}.pkl']:
+        if os.path.exists(file):
+            os.remove(file)
+
+# function to store dataframe in parquet format if possible, else in pickle format
+def write_frame(df, data_file):
+    temp_file = f'{data_file}.{os.getpid()}.{get_ident()}.tmp'
+    try:
+        df.to_parquet(temp_file)
+        fmt = 'parquet'
+    except (ImportError, ValueError, TypeError, NotImplementedError):
+        # pyarrow is not installed or data has mixed types not supported by parquet
+        df.to_pickle(temp_file)
+        fmt = 'pkl'
+    # replace atomically so parallel reports never read a half written file
+    os.replace(temp_file, f'{data_file}.{fmt}')
+    return fmt
+
+def read_frame(data_file, fmt):
+    if fmt == 'parquet':
+        return pd.read_parquet(f'{data_file}.parquet')
+    return pd.read_pickle(f'{data_file}.pkl')
+
+def write_json(json_file, data):
+    temp_file = f'{json_file}.{os.getpid()}.{get_ident()}.tmp'
+    with open(temp_file, 'w') as file:
+        json.dump(data, file)
+    os.replace(temp_file, json_file)
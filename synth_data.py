@@ -0,0 +1,157 @@
+#! /usr/bin/env python3
+# -------------------------------------------------------------------------------
+# Name:        synth_data
+# Purpose:     Generate realistic balance sheet html and BO files of any size for benchmarks
+#
+# Author:      phenomroman
+#
+# Created:     17-10-2026
+# Copyright:   (c) phenomroman 2026
+# Licence:     BSD
+#-------------------------------------------------------------------------------
+from datetime import datetime, timedelta
+from auto_iss import branch_gl_codes, bill_gl
+import argparse
+import random
+import csv
+import os
+
+# branches of the bank, more branches are numbered after them
+bank_br_codes = ['001', '091', '101', '102', '103', '104', '105', '106', '110', '116', '195', '200', '301', '331', '999']
+# rows of a BO sheet above which the BO is written as csv, as an excel sheet holds 1,048,576 rows
+max_sheet_rows = 1_000_000
+
+# function to get given number of 3 digit branch codes, starting with branches of the bank
+def synth_br_codes(branches):
+    if branches > 1000:
+        raise ValueError("Branch codes have 3 digits, so at most 1000 branches")
+    extra = [f'{n:03d}' for n in range(1000) if f'{n:03d}' not in bank_br_codes]
+    return (bank_br_codes + extra)[:branches]
+
+# function to generate balance sheets of branches and BO files in given directory, returns branch codes
+def generate(root, branches=15, rows=10_000, gl_size=300, seed=1, balance_date=None):
+    rng = random.Random(seed)
+    # dates of report period like auto_iss, last month & first day of its year
+    balance_date = balance_date or (datetime.today().replace(day=1) - timedelta(days=1))
+    balance_date = datetime(balance_date.year, balance_date.month, balance_date.day)
+    br_codes = synth_br_codes(branches)
+    os.makedirs(os.path.join(root, 'BAL_SHEET'), exist_ok=True)
+    os.makedirs(os.path.join(root, 'RAW_BO'), exist_ok=True)
+    for br_code in br_codes:
+        balance_sheet_html(os.path.join(root, 'BAL_SHEET', f'BALSHEETBRN_{br_code}.html'), gl_rows(rng, branch_gl_codes(), gl_size))
+    bill_total = bills_508(root, rng, br_codes, rows)
+    # consolidated balance sheet with contingent bill GL matching 508 bills
+    fixed = {gl_code: (round(bill_total, 2) if gl_code == bill_gl[0] else 0.0) for gl_code in bill_gl}
+    balance_sheet_html(os.path.join(root, 'BAL_SHEET', 'BALSHEET_ALL.html'), gl_rows(rng, bill_gl, gl_size, fixed))
+    export_603r(root, rng, br_codes, rows)
+    matured_acceptance(root, rng, br_codes, rows, balance_date)
+    overdue_625(root, rng, br_codes, rows, balance_date)
+    same_month_adjusted(root, rng, br_codes, rows)
+    write_bo(os.path.join(root, 'RAW_BO', 'Ex-Rate.xlsx'), 1, ['Ccy', 'Ex. Rate'], [['USD', 110.5], ['EUR', 118.25], ['BDT', 1.0]])
+    return br_codes
+
+def amount(rng, low=-1e6, high=5e7):
+    return round(rng.uniform(low, high), 2)
+
+# function to get rows of a GL tree with given GL codes among random GLs, a group header row every 25 GLs
+def gl_rows(rng, gl_codes, gl_size, fixed={}):
+    all_codes = list(gl_codes) + [rng.randrange(100000000, 999999999) for _ in range(max(0, gl_size - len(gl_codes)))]
+    rng.shuffle(all_codes)
+    rows = []
+    for n, gl_code in enumerate(all_codes):
+        if n % 25 == 0:
+            rows.append([1, '', gl_code // 10000 * 10000 + 1, 'GROUP HEADER', '', '', ''])
+        total = fixed.get(gl_code, amount(rng))
+        fcy = 0.0 if rng.random() < 0.7 else amount(rng)
+        rows.append([3, 'Y', gl_code, f'GL {gl_code} DESC', f'{fcy:,.2f}', f'{total - fcy:,.2f}', f'{total:,.2f}'])
+    return rows
+
+# function to write balance sheet html like core banking, title table then GL tables of 40 rows and footer table
+def balance_sheet_html(path, rows, page=40):
+    html = ['<html><body><table><tr><td>BALANCE SHEET</td><td>report</td></tr></table>']
+    for i in range(0, len(rows), page):
+        html.append('<table><tr><th>Level</th><th>Leaf</th><th>GL Code</th><th>GL Description</th>'
+                    '<th>FCY Balance</th><th>LCY Balance</th><th>Total</th></tr>')
+        html += ['<tr>' + ''.join(f'<td>{cell}</td>' for cell in row) + '</tr>' for row in rows[i:i+page]]
+        html.append('</table>')
+    html.append('<table><tr><td>End of report</td></tr></table></body></html>')
+    with open(path, 'w') as file:
+        file.write('\n'.join(html))
+
+# function to write BO rows under a title and blank rows with header at given row, as csv if too many rows for a sheet
+def write_bo(path, row_index, columns, rows, title='REPORT'):
+    if len(rows) > max_sheet_rows:
+        path = os.path.splitext(path)[0] + '.csv'
+        with open(path, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerows([[title]] + [[]] * (row_index - 2) + [columns] if row_index > 1 else [columns])
+            writer.writerows([[value.strftime('%Y-%m-%d') if isinstance(value, datetime) else value for value in row]
+                              for row in rows])
+        return path
+    from openpyxl import Workbook
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Report1')
+    if row_index > 1:
+        sheet.append([title])
+        for _ in range(row_index - 2):
+            sheet.append([])
+    sheet.append(columns)
+    for row in rows:
+        sheet.append(row)
+    workbook.save(path)
+    return path
+
+# function to write 508 bills BO, returns total of bills counted in contingent GL
+def bills_508(root, rng, br_codes, rows):
+    ib_codes = ['IB01', 'IB02', 'IB16', 'IB20', 'IB06', 'IB30', 'IB40']
+    lc_codes = ['04', '99', '02', '06', '10', '12', '18', '22', '25', '27', '01', '14', '16', '50']
+    data = []
+    for n in range(rows):
+        br_code, ib_code, lc_code = rng.choice(br_codes), rng.choice(ib_codes), rng.choice(lc_codes)
+        data.append([n+1, f'{br_code}{ib_code}{n:07d}', f'{br_code}ILC{lc_code}{n:06d}', 'CUSTOMER', None, 'USD',
+                     datetime(2023, 1, 1) + timedelta(days=rng.randrange(300)), amount(rng, 1e3, 1e6), None, 'NOTE'])
+    if rows: #blank row inside data like the BO export
+        data.insert(min(5, rows), [None] * 10)
+    write_bo(os.path.join(root, 'RAW_BO', '508 Bills.xlsx'), 3,
+             ['Sl', 'Cont. Ref  No.', 'Contract No.', 'Customer', 'Empty', 'Ccy', 'Issue Date', 'LCY Balance', 'Empty2', 'Note'], data)
+    ignored = ['IB02', 'IB06', 'IB13', 'IB52', 'IB56', 'IB63', 'IB66', 'IB16']
+    return sum(row[7] for row in data if row[1] and row[1][3:7] not in ignored)
+
+def export_603r(root, rng, br_codes, rows):
+    data = []
+    for n in range(rows):
+        accept_date = rng.choice([None, 'Due 2023', 'DOC', (datetime(2023, 1, 1) + timedelta(days=rng.randrange(300))).strftime('%d-%b-%Y')])
+        data.append([f'{rng.choice(br_codes)}EB{n:08d}', accept_date, rng.choice(['COL', 'DIS', 'NEG']),
+                     rng.choice(['BDT', 'BDT', 'USD', 'EUR']), amount(rng, 1e3, 1e6)])
+    write_bo(os.path.join(root, 'RAW_BO', '603R Export.xlsx'), 4,
+             ['Contract Ref No', 'Accept Dt.', 'OPC', 'CUR', 'Bill Outstanding LCY'], data)
+
+# function to write matured acceptance BO with maturity dates around the report year
+def matured_acceptance(root, rng, br_codes, rows, balance_date):
+    data = [[f'LDBP{rng.choice(br_codes)}{n:07d}', datetime(balance_date.year - 1, 6, 1) + timedelta(days=rng.randrange(600)),
+             rng.choice(['DIS', 'COL']), amount(rng, 1e3, 1e6)] for n in range(rows)]
+    write_bo(os.path.join(root, 'RAW_BO', 'Acceptance Mautured.xlsx'), 4, ['USER_REF_NO', 'MATURITY_DATE', 'OPERATION', 'LCY_AMOUNT'], data)
+
+# function to write 625 overdue BO with maturity dates before and after balance date
+def overdue_625(root, rng, br_codes, rows, balance_date):
+    data = [[f'IDBP{rng.choice(br_codes)}{n:07d}', rng.choice(['DIS', 'COL']), balance_date - timedelta(days=rng.randrange(-60, 300)),
+             rng.choice(['USD', 'EUR', 'BDT']), amount(rng, 1e2, 1e5)] for n in range(rows)]
+    write_bo(os.path.join(root, 'RAW_BO', '625 Overdue Local.xlsx'), 5, ['User Ref', 'Opn', 'Maturity Date', 'Ccy', 'Bill Amt'], data)
+
+# function to write same month adjusted BO, with some loans of unknown branch
+def same_month_adjusted(root, rng, br_codes, rows):
+    product_codes = ['L035', 'L041', 'L044', 'L047', 'L060', 'L061', 'L062', 'L063', 'L064', 'L072', 'L073', 'L076',
+                     'L223', 'L226', 'L233', 'L999', 'L100']
+    data = [[rng.choice(product_codes), f'{rng.choice(br_codes + ["777"])}-0000{n:08d}', amount(rng, 1e3, 1e6)] for n in range(rows)]
+    write_bo(os.path.join(root, 'RAW_BO', 'Same Month Adjusted.xlsx'), 3, ['PRODUCT_CODE', 'RELATED_ACCOUNT', 'LCY_AMOUNT'], data)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='generate BAL_SHEET and RAW_BO input files of ISS reports')
+    parser.add_argument('root', help='directory to write BAL_SHEET and RAW_BO in')
+    parser.add_argument('--branches', type=int, default=15, help='number of branches')
+    parser.add_argument('--rows', type=int, default=10_000, help='rows of each BO file')
+    parser.add_argument('--gl-size', type=int, default=300, help='GLs in balance sheet of each branch')
+    parser.add_argument('--seed', type=int, default=1, help='seed of random data, same seed gives same files')
+    args = parser.parse_args()
+    br_codes = generate(args.root, args.branches, args.rows, args.gl_size, args.seed)
+    print(f"Generated {len(br_codes)} branches with {args.rows} BO rows in {args.root}")
@@ -0,0 +1,94 @@
+# differential tests of streaming balance sheet reader against html_to_xl, which parses with pd.read_html
+import os
+import random
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from feats import html_to_xl, read_balance_sheet
+from synth_data import balance_sheet_html, gl_rows
+from auto_iss import branch_gl_codes
+
+cols = ['Level', 'Leaf', 'GL Code', 'GL Description', 'FCY Balance', 'LCY Balance', 'Total']
+ignore_list = ['Leaf', 'GL Description']
+amount_cols = ['FCY Balance', 'LCY Balance', 'Total']
+
+# function to check both readers give the same frame & index, html_to_xl filtered by GL codes if given
+def assert_same(path, table_range=slice(1, -1), gl_codes=None, cols=cols, ignore_list=ignore_list, paisa_cols=[]):
+    expected = html_to_xl(path, table_range, cols, ignore_list, paisa_cols=paisa_cols)
+    if gl_codes is not None:
+        expected = expected[expected['GL Code'].isin(gl_codes)]
+    actual = read_balance_sheet(path, table_range, cols, ignore_list, gl_codes=gl_codes, paisa_cols=paisa_cols)
+    pd.testing.assert_frame_equal(actual, expected)
+    pd.testing.assert_index_equal(actual.index, expected.index)
+
+# function to write html of given tables, each a list of row html
+def write_html(path, tables):
+    html = ['<html><body>'] + [f'<table>{"".join(rows)}</table>' for rows in tables] + ['</body></html>']
+    path.write_text('\n'.join(html))
+    return str(path)
+
+def row(*cells, tag='td'):
+    return '<tr>' + ''.join(f'<{tag}>{cell}</{tag}>' for cell in cells) + '</tr>'
+
+header = row(*cols, tag='th')
+
+@pytest.fixture
+def synth_sheet(tmp_path):
+    path = str(tmp_path / 'BALSHEETBRN_001.html')
+    balance_sheet_html(path, gl_rows(random.Random(1), branch_gl_codes(), 300))
+    return path
+
+def test_synth_sheet(synth_sheet):
+    assert_same(synth_sheet)
+
+def test_synth_sheet_paisa(synth_sheet):
+    assert_same(synth_sheet, paisa_cols=amount_cols)
+
+@pytest.mark.parametrize('table_range', [slice(1, -1), slice(1, 8), slice(2, 5), slice(1, -3), slice(3, -2)])
+def test_table_ranges(synth_sheet, table_range):
+    assert_same(synth_sheet, table_range)
+
+def test_gl_codes(synth_sheet):
+    gl_codes = branch_gl_codes()[:20]
+    assert_same(synth_sheet, gl_codes=gl_codes)
+    assert_same(synth_sheet, slice(2, -2), gl_codes=gl_codes, paisa_cols=amount_cols)
+
+def test_thead(tmp_path):
+    path = write_html(tmp_path / 'thead.html', [
+        [row('BALANCE SHEET')],
+        ['<thead>', row(*cols), '</thead><tbody>', row(3, 'Y', 150120005, 'GL A', '0.00', '1,234.50', '1,234.50'),
+         row(3, 'Y', 150120041, 'GL B', '10.00', '-20.25', '-10.25'), '</tbody>'],
+        [header, row(3, 'Y', 150120011, 'GL C', '0.00', '5.00', '5.00')],
+        [row('End of report')]])
+    assert_same(path)
+
+def test_colspan(tmp_path):
+    path = write_html(tmp_path / 'colspan.html', [
+        [row('BALANCE SHEET')],
+        [header, row(3, 'Y', 150120005, 'GL A', '0.00', '1.00', '1.00'),
+         '<tr><td>3</td><td>Y</td><td>150120041</td><td colspan="2">GL B</td><td>2.00</td><td>2.00</td></tr>',
+         '<tr><td colspan="2">1</td><td>150120001</td><td>GROUP</td><td>3.00</td><td>3.00</td><td>3.00</td></tr>'],
+        [row('End of report')]])
+    assert_same(path)
+
+def test_na_strings(tmp_path):
+    path = write_html(tmp_path / 'na.html', [
+        [row('BALANCE SHEET')],
+        [header] + [row(3, leaf, 150120005 + n, desc, fcy, '1.00', '1.00') for n, (leaf, desc, fcy) in enumerate(
+            [('Y', 'N/A', '0.00'), ('NA', 'GL B', '0.00'), ('Y', 'GL C', 'nan'), ('null', 'None', '2.00'),
+             ('', 'GL E', '3.00'), ('Y', 'GL F', '#N/A'), ('Y', 'GL G', '4.00'), ('Y', 'NaN GL', '5.00')])],
+        [row('End of report')]])
+    assert_same(path)
+
+def test_thousands_separators(tmp_path):
+    amounts = ['1,234,567.89', '-9,876,543,210.01', '1,000', '12.5', '-0.01']
+    path = write_html(tmp_path / 'thousands.html', [
+        [row('BALANCE SHEET')],
+        [header] + [row(3, 'Y', f'{150120005 + n:,}', 'GL', amount, amount, amount) for n, amount in enumerate(amounts)],
+        [row('End of report')]])
+    assert_same(path)
+    assert_same(path, paisa_cols=amount_cols)
+    assert_same(path, gl_codes=[150120005, 150120007])
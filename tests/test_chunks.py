@@ -0,0 +1,70 @@
+# differential tests of chunked BO totals against reading the whole BO in memory
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from synth_data import generate
+from auto_iss import same_m_amounts, import_bill_amounts, import_bill_report, export_local_bills, load_gl, bill_gl
+
+chunk_sizes = [1, 7, 1000]
+
+@pytest.fixture(scope='module')
+def inputs(tmp_path_factory):
+    root = tmp_path_factory.mktemp('inputs')
+    br_codes = generate(str(root), branches=4, rows=300, gl_size=60)
+    return root, br_codes
+
+# function to get path of a BO file by hint of its name like report tasks
+def bo_file(root, hint):
+    return next(str(path) for path in (root / 'RAW_BO').iterdir() if hint in path.name.lower())
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path) #parse cache of reports is in working directory
+    return tmp_path
+
+@pytest.mark.parametrize('chunk_size', chunk_sizes)
+def test_same_month_amounts(inputs, chunk_size):
+    root, br_codes = inputs
+    expected = same_m_amounts(str(root / 'RAW_BO'), br_codes)
+    pd.testing.assert_series_equal(same_m_amounts(str(root / 'RAW_BO'), br_codes, chunk_size), expected, check_dtype=False)
+
+@pytest.mark.parametrize('chunk_size', chunk_sizes)
+def test_bill_amounts(inputs, chunk_size, workdir):
+    root, br_codes = inputs
+    url = bo_file(root, 'bills')
+    df_cat, total = import_bill_amounts(url, br_codes, False, 0, str(workdir))
+    df_cat_chunks, total_chunks = import_bill_amounts(url, br_codes, False, chunk_size, str(workdir))
+    pd.testing.assert_frame_equal(df_cat_chunks, df_cat, check_dtype=False)
+    assert total_chunks == pytest.approx(total, abs=0.005)
+
+@pytest.mark.parametrize('exact', [False, True])
+def test_bill_report(inputs, exact, workdir):
+    root, br_codes = inputs
+    url = bo_file(root, 'bills')
+    df_gl = load_gl(str(root / 'BAL_SHEET' / 'BALSHEET_ALL.html'), bill_gl, exact)
+    # bill amounts of both paths reconcile with GL and give the same report
+    for chunk_size, name in [(0, 'memory.csv'), (7, 'chunks.csv')]:
+        bill_amounts = import_bill_amounts(url, br_codes, False, chunk_size, str(workdir), exact=exact)
+        import_bill_report(bill_amounts, df_gl, [], str(workdir / name), exact)
+    pd.testing.assert_frame_equal(pd.read_csv(workdir / 'chunks.csv'), pd.read_csv(workdir / 'memory.csv'), check_exact=exact,
+                                  atol=0.005)
+
+@pytest.mark.parametrize('chunk_size', chunk_sizes)
+def test_local_bills(inputs, chunk_size, workdir):
+    root, br_codes = inputs
+    url = bo_file(root, '603r')
+    expected = export_local_bills(url, br_codes, False, 0, str(workdir))
+    for actual, amounts in zip(export_local_bills(url, br_codes, False, chunk_size, str(workdir)), expected):
+        pd.testing.assert_series_equal(actual, amounts, check_dtype=False)
+
+def test_exact_totals(inputs, workdir):
+    root, br_codes = inputs
+    url = bo_file(root, 'bills')
+    df_cat, total = import_bill_amounts(url, br_codes, False, 0, str(workdir), exact=True)
+    df_cat_chunks, total_chunks = import_bill_amounts(url, br_codes, False, 7, str(workdir), exact=True)
+    pd.testing.assert_frame_equal(df_cat_chunks, df_cat, check_dtype=False)
+    assert total_chunks == total
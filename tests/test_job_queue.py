@@ -0,0 +1,68 @@
+# tests of running jobs through a job directory, with workers stopping midway
+import multiprocessing
+import os
+import sys
+import time
+from threading import Thread
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from feats import JobQueue, work, job_dirs, claim_job
+
+def slow_square(x, seconds=1):
+    time.sleep(seconds)
+    return x * x
+
+def failing(message):
+    raise ValueError(message)
+
+# function to run jobs in a thread of this process until idle for given seconds
+def start_worker(job_dir, max_idle=2):
+    worker = Thread(target=work, args=(str(job_dir),), kwargs={'max_idle': max_idle, 'heartbeat': 0.2, 'poll': 0.05}, daemon=True)
+    worker.start()
+    return worker
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = JobQueue(str(tmp_path), local_workers=0, timeout=1, retries=1, poll=0.05)
+    yield queue
+    queue.shutdown(cancel_futures=True)
+
+def test_results(queue, tmp_path):
+    futures = [queue.submit(slow_square, x, 0) for x in range(5)]
+    start_worker(tmp_path).join()
+    assert [future.result(timeout=5) for future in futures] == [0, 1, 4, 9, 16]
+    assert os.listdir(tmp_path / 'results') == []
+
+def test_error_result(queue, tmp_path):
+    future = queue.submit(failing, 'bad input')
+    start_worker(tmp_path)
+    with pytest.raises(ValueError, match='bad input'):
+        future.result(timeout=10)
+
+# a worker killed while running a job stops touching its claim, so the job is given to another worker
+def test_killed_worker(queue, tmp_path):
+    future = queue.submit(slow_square, 7, 1)
+    worker = multiprocessing.get_context('spawn').Process(target=work, args=(str(tmp_path),), kwargs={'heartbeat': 10})
+    worker.start()
+    deadline = time.time() + 30
+    while not os.listdir(tmp_path / 'claimed') and time.time() < deadline:
+        time.sleep(0.05)
+    worker.kill()
+    worker.join()
+    assert not future.done()
+    start_worker(tmp_path, max_idle=5)
+    assert future.result(timeout=30) == 49
+    assert list(queue.attempts.values()) == [2]
+
+# a job claimed by workers that all stopped fails once its retries are used
+def test_retries_used(queue, tmp_path):
+    future = queue.submit(slow_square, 3, 0)
+    dirs = job_dirs(str(tmp_path))
+    deadline = time.time() + 30
+    while not future.done() and time.time() < deadline:
+        claim_job(dirs, 'stopped-worker')
+        time.sleep(0.05)
+    with pytest.raises(RuntimeError, match='stopped on 2 workers'):
+        future.result(timeout=0)
@@ -0,0 +1,49 @@
+# tests of exact amounts, parsed into whole paisa and reconciled to the paisa
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from feats import parse_paisa, paisa_dtype
+from auto_iss import import_bill_report, bill_gl
+
+@pytest.mark.parametrize('text, paisa', [
+    ('1,234.56', 123456), ('1,234.5', 123450), ('0.1', 10), ('7', 700), ('-12.3', -1230), ('-0.07', -7),
+    ('  -1,000,000.07 ', -100000007), ('12,345,678,901.99', 1234567890199),
+    # more digits than a float keeps exactly
+    ('90,071,992,547,409.93', 9007199254740993),
+])
+def test_parse_text(text, paisa):
+    assert parse_paisa(pd.Series([text], dtype=object))[0] == paisa
+
+def test_parse_mixed():
+    values = pd.Series(['1,000.5', 250, -3.25, '1e3', 'N/A', None], dtype=object)
+    expected = pd.Series([100050, 25000, -325, 100000, pd.NA, pd.NA], dtype=paisa_dtype)
+    pd.testing.assert_series_equal(parse_paisa(values), expected)
+
+def test_parse_numbers():
+    expected = pd.Series([150, -7, pd.NA], dtype=paisa_dtype)
+    pd.testing.assert_series_equal(parse_paisa(pd.Series([1.5, -0.07, None])), expected)
+
+# function to get bill amounts of two branches and consolidated GL with given totals in paisa
+def bill_inputs(total_bo, total_gl):
+    df_cat = pd.DataFrame(0, index=['local_export', 'local_other', 'foreign', 'foreign_other', 'other'], columns=['001', '101'],
+                          dtype=paisa_dtype)
+    df_cat.loc['local_export', '001'] = total_bo
+    df_gl = pd.DataFrame({'GL Code': bill_gl, 'Total': [total_gl] + [0] * (len(bill_gl) - 1)}).astype({'Total': paisa_dtype})
+    return (df_cat, total_bo), df_gl
+
+def test_exact_reconciled(tmp_path):
+    bill_amounts, df_gl = bill_inputs(123456789012345, 123456789012345)
+    outfile = tmp_path / 'bills.csv'
+    import_bill_report(bill_amounts, df_gl, [], str(outfile), exact=True)
+    assert outfile.exists()
+
+# a paisa off is a mismatch with exact amounts, though within the taka allowed of float amounts
+@pytest.mark.parametrize('total_gl', [123456789012344, 123456789012346])
+def test_exact_mismatch(tmp_path, total_gl):
+    bill_amounts, df_gl = bill_inputs(123456789012345, total_gl)
+    with pytest.raises(ValueError, match=r'BO \(1,234,567,890,123\.45\) does not match'):
+        import_bill_report(bill_amounts, df_gl, [], str(tmp_path / 'bills.csv'), exact=True)
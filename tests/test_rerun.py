@@ -0,0 +1,52 @@
+# tests of reruns with a result store, recomputing only tasks of changed input files
+import os
+import random
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from feats import TaskGraph, ResultStore
+from synth_data import generate, balance_sheet_html, gl_rows
+from auto_iss import Options, import_loan_tasks, export_bill_tasks, branch_gl_codes, store_dir
+
+options = Options(report_format='csv', work_format='csv')
+
+@pytest.fixture
+def br_codes(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path) #inputs, reports and result store are in working directory
+    return generate(str(tmp_path), branches=3, rows=50, gl_size=40)
+
+# function to run loan & export reports in one task graph, returns names of tasks computed again
+def run_reports(br_codes, full_run=False):
+    store = ResultStore(store_dir)
+    if full_run:
+        store.clear()
+    graph = TaskGraph(1, store)
+    for report_tasks in [import_loan_tasks, export_bill_tasks]:
+        report_tasks(graph, br_codes, options=options)
+    graph.run()
+    assert not [task.error for task in graph.tasks.values() if task.error]
+    return {name for name, task in graph.tasks.items() if not task.fresh}
+
+def read_reports():
+    return [pd.read_csv(os.path.join(folder, file)) for folder in ['iss_import_loan', 'iss_export_bill']
+            for file in os.listdir(folder) if file.endswith('.csv')]
+
+def test_unchanged(br_codes):
+    first = run_reports(br_codes)
+    assert {f'loan_matrix_{br_code}' for br_code in br_codes} <= first
+    assert run_reports(br_codes) == set()
+
+def test_changed_branch(br_codes):
+    run_reports(br_codes)
+    changed = br_codes[1]
+    balance_sheet_html(os.path.join('BAL_SHEET', f'BALSHEETBRN_{changed}.html'), gl_rows(random.Random(9), branch_gl_codes(), 40))
+    assert run_reports(br_codes) == {f'gl_{changed}', f'loan_matrix_{changed}', f'loan_work_file_{changed}', f'export_gl_{changed}',
+                                     'loan_report', 'export_report'}
+    # reports from stored results of other branches are same as computing all branches again
+    reports = read_reports()
+    run_reports(br_codes, full_run=True)
+    for report, expected in zip(reports, read_reports()):
+        pd.testing.assert_frame_equal(report, expected)